@@ -0,0 +1,132 @@
+# analytics.py
+# Vectorized focus analytics over a user's full session history (pandas/NumPy).
+# Used by the final report; all per-session math runs on columns, not Python loops,
+# and whole-history sums come pre-aggregated from SQLite.
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import database
+
+ROLLING_WINDOW = 10             # sessions in the rolling completion/distraction window
+ROLLING_HISTORY = 1000          # most recent sessions loaded for the rolling series
+MIN_SESSION_MIN = 5             # never recommend sessions shorter than this
+
+# Totals and breakdowns come from the (user, topic, hour) rollup maintained by
+# triggers (database.hour_stats); only the rolling series reads session rows.
+GROUPS_SQL = """
+    SELECT topic, hour, SUM(sessions), SUM(focus_sec), SUM(distractions), SUM(completed)
+    FROM {table}
+    WHERE user_id = ?
+    GROUP BY topic, hour
+"""
+RECENT_SQL = """
+    SELECT IFNULL(duration_sec, 0), IFNULL(distractions, 0), IFNULL(completed, 0)
+    FROM {table}
+    WHERE user_id = ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+GROUP_COLUMNS = ["topic", "hour", "sessions", "focus_sec", "distractions", "completed"]
+RECENT_COLUMNS = ["duration_sec", "distractions", "completed"]
+
+# groups: per (topic, hour) sums over the whole history; recent: numeric columns of
+# the last ROLLING_HISTORY sessions, oldest first
+History = namedtuple("History", ["groups", "recent"])
+
+
+def load_sessions(user_id, include_archive=True, path=None, recent=ROLLING_HISTORY):
+    """
+    Load what analyze() needs for `user_id` as a History: per (topic, hour)
+    sums from the rollup and the numeric columns of the last `recent`
+    sessions. With include_archive, archived months are read through
+    database.history() for this user only; archived sessions are copied
+    there only when the hot DB holds fewer than `recent` of them.
+    """
+    with database.connection(path) as conn:
+        rows = conn.execute(RECENT_SQL.format(table="sessions"), (user_id, recent)).fetchall()
+        if not include_archive:
+            groups = conn.execute(GROUPS_SQL.format(table="hour_stats"), (user_id,)).fetchall()
+    if include_archive:
+        tables = ("hour_stats",) if len(rows) >= recent else ("hour_stats", "sessions")
+        with database.history(path, tables=tables, user_id=user_id) as conn:
+            groups = conn.execute(GROUPS_SQL.format(table="all_hour_stats"), (user_id,)).fetchall()
+            if "sessions" in tables:
+                rows = conn.execute(RECENT_SQL.format(table="all_sessions"), (user_id, recent)).fetchall()
+    groups = pd.DataFrame.from_records(groups, columns=GROUP_COLUMNS)
+    rows.reverse()
+    recent = pd.DataFrame(np.array(rows, dtype=np.int64).reshape(-1, 3), columns=RECENT_COLUMNS)
+    return History(groups, recent)
+
+
+def _breakdown(groups, key):
+    """Per-group sessions, focus minutes, completion rate and distraction rates."""
+    grouped = groups.groupby(key, sort=True)[["sessions", "focus_sec", "distractions", "completed"]].sum()
+    grouped["focus_min"] = grouped["focus_sec"] / 60.0
+    grouped["completion_rate"] = grouped["completed"] / grouped["sessions"]
+    grouped["distractions_per_session"] = grouped["distractions"] / grouped["sessions"]
+    grouped["distractions_per_min"] = grouped["distractions"] / grouped["focus_min"].replace(0, np.nan)
+    return grouped.drop(columns=["focus_sec", "completed"])
+
+
+def recommend_minutes(completion_rate, avg_distractions, avg_duration_min):
+    """
+    Next-session length rule, vectorized over arrays (or scalars):
+    steady and focused -> +10%, struggling -> -20% (min 5), otherwise keep.
+    Returns (minutes, rule) where rule is 'increase', 'shorten' or 'keep'.
+    """
+    completion_rate = np.asarray(completion_rate, dtype=float)
+    avg_distractions = np.asarray(avg_distractions, dtype=float)
+    avg_duration_min = np.asarray(avg_duration_min, dtype=float)
+    conditions = [(completion_rate >= 0.8) & (avg_distractions <= 1),
+                  (avg_distractions > 2) | (completion_rate < 0.6)]
+    minutes = np.select(conditions, [avg_duration_min * 1.10,
+                                     np.maximum(MIN_SESSION_MIN, avg_duration_min * 0.8)],
+                        default=avg_duration_min)
+    rule = np.select(conditions, ["increase", "shorten"], default="keep")
+    return minutes, rule
+
+
+def analyze(history, window=ROLLING_WINDOW):
+    """
+    Summarize a History from load_sessions(). Returns a dict with overall
+    totals, the rolling completion series (recent sessions), per-topic and
+    per-hour breakdowns and the recommended next session length (None for
+    an empty history).
+    """
+    groups, recent = history
+    sessions = int(groups["sessions"].sum()) if not groups.empty else 0
+    if not sessions or recent.empty:
+        return None
+    rolling_completion = recent["completed"].rolling(window, min_periods=1).mean()
+    rolling_distractions = recent["distractions"].rolling(window, min_periods=1).mean()
+    rolling_duration = (recent["duration_sec"] / 60.0).rolling(window, min_periods=1).mean()
+    recommended, rule = recommend_minutes(rolling_completion.iloc[-1], rolling_distractions.iloc[-1],
+                                          rolling_duration.iloc[-1])
+
+    total_min = groups["focus_sec"].sum() / 60.0
+    distractions = groups["distractions"].sum()
+    per_topic = _breakdown(groups, "topic")
+    per_hour = _breakdown(groups[groups["hour"] >= 0], "hour")   # -1: no start_time
+    return {
+        "sessions": sessions,
+        "total_focus_min": float(total_min),
+        "completion_rate": float(groups["completed"].sum() / sessions),
+        "avg_distractions": float(distractions / sessions),
+        "avg_duration_min": float(total_min / sessions),
+        "distractions_per_min": float(distractions / total_min) if total_min else 0.0,
+        "rolling_completion": rolling_completion,
+        "per_topic": per_topic,
+        "per_hour": per_hour,
+        "best_topic": per_topic["distractions_per_session"].idxmin(),
+        "best_hour": int(per_hour["distractions_per_min"].idxmin()) if per_hour["distractions_per_min"].notna().any() else None,
+        "recommended_minutes": float(recommended),
+        "recommendation": str(rule),
+    }
+
+
+def user_report(user_id, include_archive=True, path=None):
+    """load_sessions() + analyze() for one user."""
+    return analyze(load_sessions(user_id, include_archive, path))
@@ -0,0 +1,976 @@
+# benchmark.py
+# Micro-benchmarks for MindAnchor's hot paths.
+# Usage: python benchmark.py <name> [options]   (see --help)
+
+import os
+import sys
+import json
+import time
+import datetime
+import platform
+import sqlite3
+import argparse
+import tempfile
+
+import database
+
+
+# ---------- helpers ----------
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def _use_temp_db(tmpdir, name="bench.db"):
+    """Point database.DB_PATH at a scratch file and create the schema."""
+    database.close_all()
+    database.DB_PATH = os.path.join(tmpdir, name)
+    database.init_db()
+    return database.DB_PATH
+
+
+# ---------- db-writes: per-statement connect vs pooled WAL ----------
+def _legacy_session_writes(path, n):
+    """The pre-pool pattern: connect, execute, commit, close for every statement."""
+    for i in range(n):
+        conn = sqlite3.connect(path); cur = conn.cursor()
+        cur.execute("INSERT INTO sessions (user_id, session_name, duration_sec, distractions, completed, start_time) VALUES (?, ?, ?, ?, ?, ?)",
+                    (1, "Physics", 1500, 0, 0, "2025-01-01 10:00:00"))
+        sid = cur.lastrowid
+        conn.commit(); conn.close()
+        conn = sqlite3.connect(path); cur = conn.cursor()
+        cur.execute("UPDATE sessions SET distractions = ? WHERE id = ?", (i % 5, sid))
+        conn.commit(); conn.close()
+
+def _pooled_session_writes(n):
+    for i in range(n):
+        sid = database.start_session(1, "Physics", 1500, "2025-01-01 10:00:00")
+        database.update_session_distractions(sid, i % 5)
+
+def bench_db_writes(n=2000):
+    """Statements/sec for session create+update, before and after pooling."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # "before": rollback journal, fresh connection per statement
+        legacy_path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("CREATE TABLE sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, session_name TEXT, duration_sec INTEGER, distractions INTEGER DEFAULT 0, completed INTEGER DEFAULT 0, start_time TEXT)")
+        conn.commit(); conn.close()
+        elapsed, _ = _timed(_legacy_session_writes, legacy_path, n)
+        results["legacy_stmts_per_sec"] = (2 * n) / elapsed
+
+        # "after": pooled WAL connections
+        _use_temp_db(tmp, "pooled.db")
+        elapsed, _ = _timed(_pooled_session_writes, n)
+        results["pooled_stmts_per_sec"] = (2 * n) / elapsed
+        database.close_all()
+    results["speedup"] = results["pooled_stmts_per_sec"] / results["legacy_stmts_per_sec"]
+    return results
+
+
+# ---------- stats-queries: date(start_time) scan vs daily_stats rollup ----------
+LEGACY_DAY_FOCUS_SQL = "SELECT SUM(duration_sec) FROM sessions WHERE date(start_time) = ?"
+
+def _seed_sessions(total, users=50, start=None, batch=50_000):
+    """Append `total` sessions spread over `users` users, newest last, ~3 per user per day."""
+    start = start or datetime.datetime(2020, 1, 1, 8, 0, 0)
+    per_day = users * 3
+    with database.transaction() as cur:
+        base = cur.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        for lo in range(0, total, batch):
+            rows = []
+            for i in range(base + lo, base + min(total, lo + batch)):
+                ts = start + datetime.timedelta(days=i // per_day, minutes=(i % per_day) * 3)
+                rows.append((i % users + 1, "Physics" if i % 3 else "Mathematics", 1500, i % 4, i % 2,
+                             ts.strftime("%Y-%m-%d %H:%M:%S")))
+            cur.executemany("INSERT INTO sessions (user_id, session_name, duration_sec, distractions, completed, start_time) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        last = cur.execute("SELECT MAX(start_time) FROM sessions").fetchone()[0]
+    return datetime.date.fromisoformat(last[:10])
+
+def _avg_ms(fn, reps):
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - start) * 1000 / reps
+
+def bench_stats_queries(n=1_000_000, reps=20):
+    """Chatbot stats query latency as history grows to `n` rows (legacy scan vs rollup)."""
+    results = {}
+    sizes = [s for s in (10_000, 100_000, 1_000_000, 10_000_000) if s < n] + [n]
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_temp_db(tmp)
+        seeded = 0
+        for size in sizes:
+            day = _seed_sessions(size - seeded); seeded = size
+            with database.connection() as conn:
+                conn.execute("ANALYZE")
+                legacy = _avg_ms(lambda: conn.execute(LEGACY_DAY_FOCUS_SQL, (day.isoformat(),)).fetchone(), max(1, reps // 10))
+            rollup = _avg_ms(lambda: database.fetch_day_stats(1, day), reps)
+            results[f"{size:>10,} rows legacy ms"] = legacy
+            results[f"{size:>10,} rows rollup ms"] = rollup
+        database.close_all()
+    return results
+
+
+# ---------- distraction-writes: per-event UPDATE vs batched event appends ----------
+def bench_distraction_writes(n=20_000):
+    """Events/sec recording `n` distractions across 10 live sessions."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_temp_db(tmp)
+        sessions = [database.start_session(1, "Physics", 1500, "2025-01-01 10:00:00") for _ in range(10)]
+        counts = dict.fromkeys(sessions, 0)
+
+        def per_event_updates():
+            for i in range(n):
+                sid = sessions[i % len(sessions)]; counts[sid] += 1
+                database.update_session_distractions(sid, counts[sid])
+        elapsed, _ = _timed(per_event_updates)
+        results["update_events_per_sec"] = n / elapsed
+
+        def batched_appends():
+            for i in range(n):
+                database.enqueue_distraction_event(sessions[i % len(sessions)], "no_face")
+            database.flush_writes()
+        elapsed, _ = _timed(batched_appends)
+        results["append_events_per_sec"] = n / elapsed
+        database.shutdown()
+    return results
+
+
+# ---------- export-import: rows/sec per bulk format ----------
+def bench_export_import(n=200_000):
+    """Rows/sec exporting and re-importing `n` sessions in each format."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_temp_db(tmp)
+        _seed_sessions(n)
+        source = database.DB_PATH
+        for fmt in database.EXPORT_FORMATS:
+            out_dir = os.path.join(tmp, fmt)
+            try:
+                elapsed, counts = _timed(database.export_data, out_dir, fmt, ("sessions",), path=source)
+            except RuntimeError as e:
+                results[f"{fmt} skipped"] = str(e)
+                continue
+            results[f"{fmt} export rows/s"] = counts["sessions"] / elapsed
+            elapsed, counts = _timed(database.import_data, out_dir, fmt, ("sessions",), path=os.path.join(tmp, f"{fmt}.db"))
+            results[f"{fmt} import rows/s"] = counts["sessions"] / elapsed
+        database.close_all()
+    return results
+
+
+# ---------- analytics: full-history report for one user ----------
+def bench_analytics(n=100_000, reps=5):
+    """Load + analyze time for one user with `n` sessions."""
+    import analytics  # needs pandas/numpy
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_temp_db(tmp)
+        _seed_sessions(n, users=1)
+        results["load_ms"] = _avg_ms(lambda: analytics.load_sessions(1), reps)
+        df = analytics.load_sessions(1)
+        results["analyze_ms"] = _avg_ms(lambda: analytics.analyze(df), reps)
+        database.close_all()
+    return results
+
+
+# ---------- face-detectors: ms/frame and presence precision/recall ----------
+def _load_labeled_frames(data, limit=None):
+    """
+    Read a labeled clip set: `data`/labels.csv with rows 'file,has_face'
+    (file relative to `data`, has_face 0/1). Returns [(frame, bool)].
+    """
+    import csv, cv2
+    frames = []
+    with open(os.path.join(data, "labels.csv"), newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0] == "file":
+                continue
+            frame = cv2.imread(os.path.join(data, row[0]))
+            if frame is not None:
+                frames.append((frame, row[1].strip() == "1"))
+            if limit and len(frames) >= limit:
+                break
+    return frames
+
+def bench_face_detectors(data="clips", n=None):
+    """Per-backend detection time and presence precision/recall on a labeled frame set."""
+    import face_detector
+    frames = _load_labeled_frames(data, n)
+    if not frames:
+        return {"error": f"no labeled frames found in {data}/labels.csv"}
+    results = {}
+    for backend, cls in face_detector.BACKENDS.items():
+        try:
+            detector = cls()
+        except Exception as e:
+            results[f"{backend} skipped"] = str(e)
+            continue
+        tp = fp = fn = 0
+        start = time.perf_counter()
+        for frame, has_face in frames:
+            found = len(detector.detect(frame)) > 0
+            tp += found and has_face; fp += found and not has_face; fn += (not found) and has_face
+        elapsed = time.perf_counter() - start
+        results[f"{backend} ms/frame"] = elapsed * 1000 / len(frames)
+        results[f"{backend} precision"] = tp / (tp + fp) if tp + fp else 0.0
+        results[f"{backend} recall"] = tp / (tp + fn) if tp + fn else 0.0
+    return results
+
+
+# ---------- presence-pipeline: detector-only vs detect-then-track on a recorded clip ----------
+def _read_clip(data, limit=None):
+    import cv2
+    cap = cv2.VideoCapture(data)
+    frames = []
+    while limit is None or len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def _present(faces, frame):
+    """The camera loop's rule: largest face covers at least 1% of the frame."""
+    import presence
+    return presence.face_present(faces, frame)
+
+def bench_presence_pipeline(data="clips/session.mp4", n=None):
+    """CPU per frame for full detection on every frame vs FaceTracker on a recorded clip."""
+    import face_detector, presence
+    frames = _read_clip(data, n)
+    if not frames:
+        return {"error": f"could not read frames from {data}"}
+    detector = face_detector.get_detector()
+    start = time.process_time()
+    baseline = [_present(detector.detect(f), f) for f in frames]
+    detect_cpu = time.process_time() - start
+
+    tracker = presence.FaceTracker(detector)
+    start = time.process_time()
+    tracked = [_present(tracker.update(f), f) for f in frames]
+    track_cpu = time.process_time() - start
+    return {"frames": len(frames),
+            "detect_only_cpu_ms_per_frame": detect_cpu * 1000 / len(frames),
+            "tracked_cpu_ms_per_frame": track_cpu * 1000 / len(frames),
+            "cpu_reduction_x": detect_cpu / track_cpu if track_cpu else float("inf"),
+            "full_detections": tracker.detections,
+            "presence_agreement": sum(a == b for a, b in zip(baseline, tracked)) / len(frames)}
+
+
+# ---------- motion-gate: CPU and absence-detection latency with/without the gate ----------
+def _transition_lag(reference, candidate):
+    """Mean frames until `candidate` matches each change in `reference`."""
+    lags = []
+    for i in range(1, len(reference)):
+        if reference[i] != reference[i - 1]:
+            j = i
+            while j < len(candidate) and candidate[j] != reference[i]:
+                j += 1
+            lags.append(j - i)
+    return sum(lags) / len(lags) if lags else 0.0
+
+def bench_motion_gate(data="clips/session.mp4", n=None):
+    """Replay a clip through PresencePipeline with and without the motion gate."""
+    import face_detector, presence
+    frames = _read_clip(data, n)
+    if not frames:
+        return {"error": f"could not read frames from {data}"}
+    detector = face_detector.get_detector()
+    reference = [_present(detector.detect(f), f) for f in frames]
+    results = {"frames": len(frames)}
+    for label, gated in (("ungated", False), ("gated", True)):
+        pipeline = presence.PresencePipeline(detector, motion_gate=gated)
+        start = time.process_time()
+        seen = [_present(pipeline.process(f), f) for f in frames]
+        cpu = time.process_time() - start
+        results[f"{label} cpu_ms_per_frame"] = cpu * 1000 / len(frames)
+        results[f"{label} transition_lag_frames"] = _transition_lag(reference, seen)
+        if gated:
+            results["gated skipped_frames"] = pipeline.gate.skipped
+    return results
+
+
+# ---------- frame-ring: per-tick frame handling, copies vs FrameRing views ----------
+class _FakeCapture:
+    """cv2.VideoCapture stand-in: read(image) fills `image` in place like OpenCV does."""
+    def __init__(self, shape=(480, 640, 3)):
+        import numpy as np
+        self._frames = [np.random.default_rng(i).integers(0, 256, shape, dtype=np.uint8) for i in range(4)]
+        self._i = 0
+
+    def read(self, image=None):
+        import numpy as np
+        self._i += 1
+        src = self._frames[self._i % len(self._frames)]
+        if image is None:
+            return True, src.copy()
+        np.copyto(image, src)
+        return True, image
+
+def _legacy_frame_tick(cap, state):
+    # camera loop copy, preview copy + strided BGR->RGB, verify copy
+    ret, frame = cap.read()
+    state["latest"] = frame.copy()
+    rgb = state["latest"].copy()[:, :, ::-1].copy()   # fromarray() makes the strided view contiguous
+    return rgb, state["latest"].copy()
+
+def _ring_frame_tick(cap, ring, state):
+    buf = ring.next_buffer()
+    ret, frame = cap.read(buf) if buf is not None else cap.read()
+    ring.commit(frame)
+    seq, view = ring.latest(after=state["seq"])
+    if view is None:
+        return None, None
+    state["seq"] = seq
+    rgb = view[:, :, ::-1].copy()   # the preview's one unavoidable conversion output
+    return rgb, ring.latest()[1]
+
+def bench_frame_ring(n=500):
+    """ms and allocated bytes per camera tick: _latest_frame copies vs FrameRing views."""
+    import tracemalloc
+    import frame_buffer
+    cap = _FakeCapture()
+    ring = frame_buffer.FrameRing()
+    legacy_state, ring_state = {"latest": None}, {"seq": 0}
+    results = {"ticks": n}
+    for label, tick in (("legacy", lambda: _legacy_frame_tick(cap, legacy_state)),
+                        ("ring", lambda: _ring_frame_tick(cap, ring, ring_state))):
+        tick()   # warm-up (the ring allocates its slots on the first commit)
+        results[f"{label} ms_per_tick"] = _avg_ms(tick, n)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        allocated = 0
+        for _ in range(n):
+            tracemalloc.reset_peak()
+            tick()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        results[f"{label} kb_allocated_per_tick"] = allocated / n / 1024
+    results["ring buffer_allocations"] = ring.allocations
+    results["ring copies_on_commit"] = ring.copies
+    return results
+
+
+# ---------- camera-open: legacy per-session open vs probed, warm CameraService ----------
+def _first_frame_ms(open_fn):
+    start = time.perf_counter()
+    cap = open_fn()
+    ok = cap is not None and cap.isOpened() and cap.read()[0]
+    elapsed = (time.perf_counter() - start) * 1000
+    if cap is not None:
+        cap.release()
+    return elapsed if ok else None
+
+def _legacy_open():
+    import cv2
+    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # what every session used to do, on every platform
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_FPS, 30)
+    if not cap.isOpened():
+        cap = cv2.VideoCapture(0)
+    return cap
+
+def bench_camera_open(n=3):
+    """Time to first frame at session start: legacy open, probed open_camera(), warm CameraService."""
+    import capture
+    results = {}
+    for label, open_fn in (("legacy", _legacy_open), ("probed", capture.open_camera)):
+        times = [_first_frame_ms(open_fn) for _ in range(n)]
+        results[f"{label} open_ms"] = sum(times) / n if None not in times else "camera unavailable"
+    service = capture.CameraService()
+    owner = object()
+    elapsed, cap = _timed(service.acquire, owner)
+    results["service cold acquire_ms"] = elapsed * 1000
+    if cap is not None:
+        service.release(owner)
+        def warm_session():
+            service.warm_up(); service.acquire(owner).read(); service.release(owner)
+        results["service warm acquire_ms"] = _avg_ms(warm_session, n)
+    service.close()
+    return results
+
+
+# ---------- preview: Tk-thread cost of one preview update ----------
+def _legacy_preview(label, frame, size):
+    # the old update_preview: full-size conversion, PIL resize, a new PhotoImage every tick
+    import cv2
+    from PIL import Image, ImageTk
+    img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).resize(size)
+    photo = ImageTk.PhotoImage(img)
+    label.config(image=photo)
+    label.image = photo
+
+def bench_preview(n=200):
+    """ms per preview update on the Tk thread: legacy path vs PreviewRenderer (needs a display)."""
+    import tkinter as tk
+    import frame_buffer, preview
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"error": f"needs a display: {e}"}
+    label = tk.Label(root); label.pack(); root.update()
+    ring = frame_buffer.FrameRing()
+    read = frame_buffer.reader(_FakeCapture(), ring)
+    renderer = preview.PreviewRenderer(label, ring)
+
+    def per_update_ms(draw):
+        total = 0.0
+        for _ in range(n):
+            read()   # a new frame each tick; capture cost is not counted
+            start = time.perf_counter()
+            draw(); root.update_idletasks()
+            total += time.perf_counter() - start
+        return total * 1000 / n
+    results = {"updates": n}
+    results["legacy ms_per_update"] = per_update_ms(lambda: _legacy_preview(label, ring.latest()[1], preview.PREVIEW_SIZE))
+    results["renderer ms_per_update"] = per_update_ms(renderer.update)
+    results["renderer ms_per_unchanged_tick"] = _avg_ms(renderer.update, n)
+    results["renderer draw_ms"] = renderer.mean_draw_ms()
+    results["renderer stats"] = dict(renderer.stats)
+    root.destroy()
+    return results
+
+
+# ---------- presence-e2e: the camera loop on a replayed or synthetic feed ----------
+class _ScriptedDetector:
+    """Reports SyntheticSource.face_box: measures the loop's timing without detector error."""
+    def __init__(self, source):
+        self.source = source
+
+    def detect(self, frame, gray=None):
+        return [self.source.face_box] if self.source.face_box else []
+
+def _absence_metrics(events, absences, threshold):
+    """Latency from each flaggable absence to its first no_face event, plus freezes outside any absence."""
+    latencies, missed = [], 0
+    for start, end in absences:
+        if end - start <= threshold:
+            continue   # shorter than the missing threshold: correctly never flagged
+        hit = next((t for t in events if start <= t <= end), None)
+        if hit is None:
+            missed += 1
+        else:
+            latencies.append(hit - start)
+    false_freezes = sum(1 for t in events if not any(s <= t <= e for s, e in absences))
+    return latencies, missed, false_freezes
+
+def _presence_replay(data, clock, adaptive):
+    import capture, face_detector, frame_buffer, governor, presence
+    if data.startswith("synthetic"):
+        face = data.partition(":")[2] or None
+        source = capture.SyntheticSource(clock=clock, face_image=face)
+        detector = face_detector.get_detector() if face else _ScriptedDetector(source)
+    else:
+        source = capture.open_source(data, clock)
+        detector = face_detector.get_detector()
+    if source is None or not isinstance(source, capture.FrameSource) or not source.isOpened():
+        return {"error": f"could not open {data}"}
+    rates = governor.PollingGovernor(presence.MISSING_THRESHOLD, presence.COOLDOWN, clock=clock) if adaptive else None
+    monitor = presence.PresenceMonitor(detector, clock, governor=rates)
+    events = []
+    wall, cpu = time.perf_counter(), time.process_time()
+    monitor.run(frame_buffer.reader(source, frame_buffer.FrameRing()),
+                on_absent=lambda: events.append(source.elapsed()),
+                should_stop=lambda: source.finished)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    media = source.elapsed()
+    source.release()
+    latencies, missed, false_freezes = _absence_metrics(events, source.absences(), monitor.missing_threshold)
+    return {"frames": monitor.frames,
+            "media_sec": media,
+            "fps": monitor.frames / wall if wall else 0.0,
+            "x_realtime": media / wall if wall else 0.0,
+            "cpu_ms_per_frame": cpu * 1000 / max(1, monitor.frames),
+            "cpu_ms_per_media_sec": cpu * 1000 / media if media else 0.0,
+            "no_face_events": len(events),
+            "absence_to_no_face_sec": sum(latencies) / len(latencies) if latencies else None,
+            "max_absence_to_no_face_sec": max(latencies) if latencies else None,
+            "missed_absences": missed,
+            "false_positive_freezes": false_freezes}
+
+def bench_presence_e2e(data="synthetic", realtime=False):
+    """
+    PresenceMonitor (the camera thread's loop) on a capture.FrameSource, with
+    fixed rates and with the adaptive PollingGovernor. Sources: 'synthetic'
+    (scripted absences, scripted detector), 'synthetic:<face photo>' (real
+    detector), an image directory with labels.csv, or a video file with
+    '<clip>.absences.csv'. As fast as possible on a virtual clock unless realtime.
+    """
+    import capture
+    results = {}
+    for label, adaptive in (("fixed", False), ("adaptive", True)):
+        clock = capture.RealClock() if realtime else capture.VirtualClock()
+        results[label] = _presence_replay(data, clock, adaptive)
+        if "error" in results[label]:
+            return results[label]
+    return results
+
+
+# ---------- lab-streams: multi-seat server capacity ----------
+def _cpu_seconds():
+    """CPU of this process plus its exited children (the detection pool after shutdown)."""
+    try:
+        import resource
+    except ImportError:
+        return time.process_time()   # Windows: pool CPU is not included
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def bench_lab_streams(n=8, seconds=15):
+    """
+    Streams per core: `n` synthetic seats on one LabServer for `seconds` of
+    real time. The synthetic face is not a real one, so the detector never
+    locks on and tracking never kicks in: a worst case for detection load.
+    A run where any seat failed, or no frame was processed, is an error.
+    """
+    import lab_server
+    results = {"streams": n, "seconds": seconds}
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_temp_db(tmp)
+        seats = [lab_server.Seat(f"seat{i}", "synthetic", minutes=seconds / 60) for i in range(n)]
+        server = lab_server.LabServer(seats)
+        cpu, wall = _cpu_seconds(), time.perf_counter()
+        try:
+            server.start()
+        except RuntimeError as e:
+            server.stop()
+            database.shutdown()
+            return {"error": str(e)}
+        server.wait()
+        server.stop()
+        cpu, wall = _cpu_seconds() - cpu, time.perf_counter() - wall
+        stats = server.stats()
+        database.shutdown()
+    frames = sum(seat["frames"] for seat in stats["seats"])
+    failed = [f"{seat['seat']}: {seat['error']}" for seat in stats["seats"] if seat["error"]]
+    if failed or not frames:
+        return {"error": f"{len(failed)}/{n} seats failed, {frames} frames", "seat_errors": failed}
+    results["frames"] = frames
+    results["detection_batches"] = stats["batches"]
+    results["mean_batch"] = stats["mean_batch"]
+    results["cpu_sec"] = cpu
+    results["cpu_ms_per_frame"] = cpu * 1000 / frames if frames else 0.0
+    results["streams_per_core"] = n * wall / cpu if cpu else 0.0
+    return results
+
+
+# ---------- cold-start: process launch to first drawn window ----------
+# Runs in a fresh interpreter so import costs count. "legacy" repeats what
+# start_app used to do before the first frame: load the spaCy model and
+# initialize both chatbot engines synchronously.
+_COLD_START_SCRIPT = """
+import sys, time
+import tkinter as tk
+from tkinter import ttk
+import database, gui
+from chatbot_manager import ChatbotManager
+mode, database.DB_PATH = sys.argv[1], sys.argv[2]
+database.init_db()
+if mode == "legacy":
+    try:
+        import spacy; spacy.load("en_core_web_sm")
+    except Exception:
+        pass
+manager = ChatbotManager(main_db_path=database.DB_PATH).start()
+if mode == "legacy":
+    try:
+        manager.wait_ready()
+    except Exception:
+        pass
+root = tk.Tk(); gui.app_state.root = root
+container = ttk.Frame(root); container.pack(expand=True, fill="both")
+gui.show_welcome_frame(root, container, gui.apply_styles(root))
+root.update()
+print(time.time())
+ready = manager.ready.exception(120) is None
+print(time.time(), ready)
+root.destroy()
+"""
+
+def _cold_start(mode, db_path):
+    import sys, subprocess
+    launched = time.time()
+    proc = subprocess.run([sys.executable, "-c", _COLD_START_SCRIPT, mode, db_path],
+                          capture_output=True, text=True, timeout=300)
+    lines = proc.stdout.split()
+    if proc.returncode != 0 or len(lines) < 3:
+        error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"error": error}
+    return {"first_frame_ms": (float(lines[-3]) - launched) * 1000,
+            "chat_ready_ms": (float(lines[-2]) - launched) * 1000,
+            "chat_ready": lines[-1] == "True"}
+
+def bench_cold_start(n=3):
+    """ms from process launch to the first drawn window (and to chat ready), chatbot init inline vs background."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("legacy", "lazy"):
+            runs = [_cold_start(mode, os.path.join(tmp, "bench.db")) for _ in range(n)]
+            if "error" in runs[0]:
+                results[mode] = runs[0]
+                continue
+            results[mode] = {key: sum(r[key] for r in runs) / n for key in ("first_frame_ms", "chat_ready_ms")}
+            results[mode]["chat_ready"] = all(r["chat_ready"] for r in runs)
+    return results
+
+
+# ---------- chat-ttft: time to first token against a stub Ollama server ----------
+STUB_PROMPT_DELAY = 0.4         # secs the stub "evaluates the prompt" before the first token
+STUB_TOKEN_DELAY = 0.05         # secs between generated tokens
+STUB_TOKENS = 30                # tokens per reply
+STUB_LOAD_DELAY = 1.5           # secs to load the model when it is not resident
+STUB_KEEP_ALIVE = 300           # secs the model stays loaded when a request sets no keep_alive (Ollama's 5m)
+
+def _keep_alive_secs(value):
+    """Ollama keep_alive ("30m", "90s", "1h", or seconds) in seconds; negative means forever."""
+    if value is None:
+        return STUB_KEEP_ALIVE
+    if isinstance(value, str) and value[-1:] in ("s", "m", "h"):
+        return float(value[:-1]) * {"s": 1, "m": 60, "h": 3600}[value[-1]]
+    return float(value)
+
+def _stub_ollama_server(prompt_delay=STUB_PROMPT_DELAY, token_delay=STUB_TOKEN_DELAY, tokens=STUB_TOKENS,
+                        load_delay=STUB_LOAD_DELAY):
+    """
+    Minimal local stand-in for the Ollama HTTP API (/api/tags,
+    /api/generate, /api/chat streamed as NDJSON or whole) with
+    CPU-bound-model pacing. A request finding the model unloaded (first
+    use, or keep_alive expired) waits load_delay first. Returns the running
+    server; its URL is f"http://127.0.0.1:{server.server_port}" and
+    server.state counts connections, requests and model loads and keeps
+    the keep_alive values sent.
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {"connections": 0, "requests": 0, "loads": 0, "keep_alive": [], "loaded_until": 0.0}
+    model_lock = threading.Lock()
+
+    def load_model(keep_alive):
+        with model_lock:
+            now = time.time()
+            if now >= state["loaded_until"]:
+                state["loads"] += 1
+                time.sleep(load_delay)
+            secs = _keep_alive_secs(keep_alive)
+            state["loaded_until"] = float("inf") if secs < 0 else time.time() + secs
+
+    def message(content, done):
+        return {"model": "tinyllama", "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+                "message": {"role": "assistant", "content": content}, "done": done}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def setup(self):
+            state["connections"] += 1
+            super().setup()
+
+        def _send_json(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": "tinyllama:latest", "model": "tinyllama:latest"}]})
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path not in ("/api/chat", "/api/generate"):
+                self.send_error(404)
+                return
+            state["requests"] += 1
+            state["keep_alive"].append(request.get("keep_alive"))
+            load_model(request.get("keep_alive"))
+            if self.path == "/api/generate":   # only warm-ups (empty prompt) are expected here
+                self._send_json({"model": "tinyllama", "response": "", "done": True})
+                return
+            words = [f"word{i} " for i in range(tokens)]
+            time.sleep(prompt_delay)
+            if not request.get("stream", True):
+                time.sleep(token_delay * tokens)
+                self._send_json(message("".join(words), True))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for word in words + [""]:
+                    line = json.dumps(message(word, word == "")).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.flush()
+                    time.sleep(token_delay)
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass   # client cancelled the stream
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def bench_chat_ttft(n=5):
+    """ms to the first visible reply text: blocking get_response vs stream_response (stub server)."""
+    server = _stub_ollama_server()
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{server.server_port}"   # read when ollama is imported
+    from chatbot_manager import ChatbotManager
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = ChatbotManager(main_db_path=_use_temp_db(tmp), host=os.environ["OLLAMA_HOST"])
+        manager.cache.size = 0   # every call repeats the prompt: measure the model, not ResponseCache
+        manager.wait_ready()
+        manager.warmed.result()
+        if not manager.ollama_available:
+            server.shutdown()
+            return {"error": "ollama client could not reach the stub server"}
+        blocking = [_timed(manager.get_response, "Give me a focus tip")[0] for _ in range(n)]
+        results["blocking ttft_ms"] = sum(blocking) / n * 1000
+        ttft, total = [], []
+        for _ in range(n):
+            start = time.perf_counter()
+            first = None
+            for _text in manager.stream_response("Give me a focus tip"):
+                first = first or time.perf_counter()
+            ttft.append(first - start); total.append(time.perf_counter() - start)
+        results["streaming ttft_ms"] = sum(ttft) / n * 1000
+        results["streaming total_ms"] = sum(total) / n * 1000
+        # cancel right after the first token: the generator must return without draining the reply
+        import threading
+        cancel = threading.Event()
+        start = time.perf_counter()
+        for _text in manager.stream_response("Give me a focus tip", cancel=cancel):
+            cancel.set()
+        results["cancel after first token_ms"] = (time.perf_counter() - start) * 1000
+        database.close_all()
+    server.shutdown()
+    return results
+
+
+# ---------- chat-latency: model warm-up, keep_alive and client reuse (stub server) ----------
+def _first_replies(manager, n):
+    manager.wait_ready()
+    manager.warmed.result()
+    for _ in range(n):
+        manager.get_response("Give me a focus tip")
+    return manager.stats.snapshot()
+
+def bench_chat_latency(n=5):
+    """First-reply TTFT with and without background warm-up, then steady-state stats and connection reuse."""
+    from chatbot_manager import ChatbotManager
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _use_temp_db(tmp)
+        for label, warm_up in (("no warm-up", False), ("warm-up", True)):
+            server = _stub_ollama_server()   # fresh server: the model starts unloaded
+            host = f"http://127.0.0.1:{server.server_port}"
+            manager = ChatbotManager(main_db_path=db_path, host=host, warm_up=warm_up).start()
+            manager.cache.size = 0   # _first_replies repeats one prompt; keep ResponseCache out of it
+            if not manager.wait_ready().ollama_available:
+                server.shutdown()
+                return {"error": "ollama client could not reach the stub server"}
+            first = _first_replies(manager, 1)
+            stats = _first_replies(manager, n)
+            results[label] = {"first ttft_ms": first["last"]["ttft_ms"],
+                              "warm_up_ms": stats["warm_up_ms"] or 0.0,
+                              "mean ttft_ms": stats["mean_ttft_ms"],
+                              "mean total_ms": stats["mean_total_ms"],
+                              "tokens/s": stats["mean_tokens_per_sec"],
+                              "model loads": server.state["loads"],
+                              "connections": server.state["connections"],
+                              "requests": server.state["requests"],
+                              "keep_alive sent": str(server.state["keep_alive"][-1])}
+            server.shutdown()
+        database.close_all()
+    return results
+
+
+# ---------- chat-cache: repeated prompts through ResponseCache (stub server) ----------
+CACHE_PROMPTS = ("Give me a focus tip", "give me a focus tip!", "How am I doing?", "how am i doing",
+                 "Any advice for staying off my phone?", "What should I study next?")
+
+def bench_chat_cache(n=30):
+    """Mean reply time for `n` prompts drawn from a few repeats, cache off vs on; then a stats change."""
+    import random
+    from chatbot_manager import ChatbotManager
+    results = {}
+    server = _stub_ollama_server()
+    host = f"http://127.0.0.1:{server.server_port}"
+    prompts = [random.Random(i).choice(CACHE_PROMPTS) for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _use_temp_db(tmp)
+        for label, size in (("no cache", 0), ("cache", 128)):
+            manager = ChatbotManager(main_db_path=db_path, host=host)
+            manager.cache.size = size
+            if not manager.wait_ready().ollama_available:
+                server.shutdown()
+                return {"error": "ollama client could not reach the stub server"}
+            manager.warmed.result()
+            elapsed = sum(_timed(manager.get_response, p)[0] for p in prompts)
+            results[label] = {"mean reply_ms": elapsed / n * 1000, **manager.cache.stats()}
+        # new session data changes the stats context: the next answer must not come from the cache
+        sid = database.start_session(None, "Bench", 1500, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        database.finalize_session(sid, 1500, True, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        before = manager.cache.stats()["hits"]
+        manager.get_response(prompts[0])
+        results["cache"]["hit after stats change"] = manager.cache.stats()["hits"] > before
+        database.close_all()
+    server.shutdown()
+    return results
+
+
+# ---------- chat-context: stats context per chat message, queried vs memoized ----------
+def bench_chat_context(n=100_000, reps=200):
+    """ms of stats context per chat message with `n` sessions of history: per-message queries vs StatsContext."""
+    from chatbot_manager import ChatbotManager
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = ChatbotManager(main_db_path=_use_temp_db(tmp))
+        manager.user_id = 1
+        days = n // 150 + 1   # _seed_sessions puts 150 sessions on each day
+        _seed_sessions(n, start=datetime.datetime.combine(datetime.date.today() - datetime.timedelta(days=days - 1),
+                                                          datetime.time(8, 0)))
+        results["legacy per message_ms"] = _avg_ms(lambda: database.fetch_day_stats(1), reps)
+        elapsed, _ = _timed(manager._get_user_stats_context)
+        results["richer context, cold_ms"] = elapsed * 1000
+        results["richer context, memoized_ms"] = _avg_ms(manager._get_user_stats_context, reps)
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sid = database.start_session(1, "Physics", 1500, now)
+        database.finalize_session(sid, 1500, True, now)
+        elapsed, _ = _timed(manager._get_user_stats_context)
+        results["after a session write_ms"] = elapsed * 1000
+        results["queries"] = f"{manager.context.queries} recomputations for {reps + 2} messages"
+        results["summary"] = manager.context.summary(1)
+        database.close_all()
+    return results
+
+
+# ---------- suite: DB layer at several scales, results appended to JSON ----------
+SUITE_SIZES = (10_000, 1_000_000, 10_000_000)
+SUITE_OUT = "bench_results.json"
+
+def _suite_one_size(tmp, size, reps):
+    import synthetic_data
+    path = os.path.join(tmp, f"suite_{size}.db")
+    database.close_all(); database.DB_PATH = path
+    r = {}
+    r["init_db_fresh_ms"], _ = _timed(database.init_db); r["init_db_fresh_ms"] *= 1000
+    elapsed, counts = _timed(synthetic_data.generate, size, users=max(10, size // 2000))
+    r["generate_rows_per_sec"] = sum(counts.values()) / elapsed
+    r["rows"] = counts
+    r["init_db_current_ms"] = _avg_ms(database.init_db, reps * 5)
+    r["save_user_ms"] = _avg_ms(lambda: database.save_user("Bench", "India", 20, "Other", "Studying"), reps)
+    r["save_session_ms"] = _avg_ms(lambda: database.save_session(1, "Physics", 1500, 1, True), reps)
+    r["save_ai_log_ms"] = _avg_ms(lambda: database.save_ai_log(1, 1, 0.8, 25), reps)
+    # user 1 is the heaviest synthetic user
+    r["fetch_sessions_for_user_ms"] = _avg_ms(lambda: database.fetch_sessions_for_user(1), reps)
+    # what ChatbotManager._get_user_stats_context (StatsContext) runs when its memo is stale
+    r["chatbot_stats_ms"] = _avg_ms(lambda: database.user_summary(1), reps)
+    r["report_today_ms"] = _avg_ms(lambda: database.fetch_daily_stats(1), reps)
+    try:
+        import analytics
+        r["report_analytics_ms"] = _avg_ms(lambda: analytics.user_report(1), max(1, reps // 20))
+    except ImportError as e:
+        r["report_analytics_ms"] = f"skipped: {e}"
+    r["check_daily_stats_ms"], _ = _timed(database.check_daily_stats); r["check_daily_stats_ms"] *= 1000
+    database.shutdown()
+    return r
+
+def bench_suite(sizes=SUITE_SIZES, reps=100):
+    """init_db, save_*, fetch and report queries on synthetic DBs of each size."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            results[str(size)] = _suite_one_size(tmp, size, reps)
+    return results
+
+def _append_json(out_file, name, results):
+    record = {"benchmark": name,
+              "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "sqlite": sqlite3.sqlite_version,
+              "machine": platform.platform(),
+              "results": results}
+    history = []
+    if os.path.exists(out_file):
+        with open(out_file, encoding="utf-8") as f:
+            history = json.load(f)
+    history.append(record)
+    with open(out_file, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+
+
+BENCHMARKS = {
+    "db-writes": bench_db_writes,
+    "stats-queries": bench_stats_queries,
+    "distraction-writes": bench_distraction_writes,
+    "export-import": bench_export_import,
+    "analytics": bench_analytics,
+    "suite": bench_suite,
+    "face-detectors": bench_face_detectors,
+    "presence-pipeline": bench_presence_pipeline,
+    "motion-gate": bench_motion_gate,
+    "frame-ring": bench_frame_ring,
+    "presence-e2e": bench_presence_e2e,
+    "camera-open": bench_camera_open,
+    "preview": bench_preview,
+    "lab-streams": bench_lab_streams,
+    "cold-start": bench_cold_start,
+    "chat-ttft": bench_chat_ttft,
+    "chat-latency": bench_chat_latency,
+    "chat-cache": bench_chat_cache,
+    "chat-context": bench_chat_context,
+}
+
+def _print_results(results, indent=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            print(f"{indent}{key}:"); _print_results(value, indent + "  ")
+        else:
+            print(f"{indent}{key:>28}: {value:,.2f}" if isinstance(value, float) else f"{indent}{key:>28}: {value}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MindAnchor benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("-n", type=int, default=None, help="workload size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="row counts for 'suite'")
+    parser.add_argument("--data", default=None, help="input for vision benchmarks (labeled frame dir, clip, or 'synthetic')")
+    parser.add_argument("--realtime", action="store_true", help="presence-e2e: pace the replay in real time")
+    parser.add_argument("--out", default=None, help=f"append results to this JSON file ('suite' defaults to {SUITE_OUT})")
+    args = parser.parse_args(argv)
+    fn = BENCHMARKS[args.name]
+    if args.name == "suite":
+        results = fn(args.sizes or SUITE_SIZES)
+        args.out = args.out or SUITE_OUT
+    else:
+        kwargs = {}
+        if args.n:
+            kwargs["n"] = args.n
+        if args.data:
+            kwargs["data"] = args.data
+        if args.realtime:
+            kwargs["realtime"] = True
+        results = fn(**kwargs)
+    _print_results(results)
+    if "error" in results:
+        sys.exit(1)   # a failed run must not pass for a measurement
+    if args.out:
+        _append_json(args.out, args.name, results)
+        print(f"Results appended to {args.out}")
+
+if __name__ == "__main__":
+    main()
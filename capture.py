@@ -0,0 +1,510 @@
+# capture.py
+# Frame sources behind the cv2.VideoCapture read() interface, so the presence
+# loop (presence.PresenceMonitor) runs the same way on a webcam, a recorded
+# clip, an image sequence or a scripted synthetic feed.
+# Replay sources follow a clock: RealClock paces them like a live camera,
+# VirtualClock replays as fast as possible with the same frame timing.
+# CameraService keeps one warm webcam across consecutive sessions.
+
+import os
+import sys
+import csv
+import time
+import math
+import threading
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False   # synthetic/replay sources need it; cv2 cannot load without it
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except Exception:
+    CV2_AVAILABLE = False
+
+CAMERA_SIZE = (640, 480)        # width, height asked of the webcam
+CAMERA_FPS = 30
+CAMERA_OPEN_TIMEOUT = 10        # secs the camera thread waits for the device
+CAMERA_IDLE_TIMEOUT = 180       # secs a warm camera stays open with no session using it
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# Synthetic feed: (seconds, face present) segments. Covers a normal absence,
+# one shorter than the 4 s missing threshold (must not freeze) and a long one.
+DEFAULT_SCRIPT = ((10, True), (8, False), (10, True), (3, False), (10, True), (15, False), (10, True))
+SYNTHETIC_FPS = 15
+SYNTHETIC_SHAPE = (480, 640, 3)
+
+
+_backends = {}                  # camera index -> VideoCapture API that opened it (probed once per process)
+
+def camera_backends():
+    """Capture APIs worth trying on this platform, fastest/most reliable first."""
+    if sys.platform.startswith("win"):
+        names = ("CAP_DSHOW", "CAP_MSMF")
+    elif sys.platform == "darwin":
+        names = ("CAP_AVFOUNDATION",)
+    else:
+        names = ("CAP_V4L2",)
+    return [getattr(cv2, n) for n in names if hasattr(cv2, n)] + [cv2.CAP_ANY]
+
+def _configure(cap, width, height, fps):
+    # each set() can renegotiate the stream, so only touch what differs
+    for prop, value in ((cv2.CAP_PROP_FRAME_WIDTH, width), (cv2.CAP_PROP_FRAME_HEIGHT, height),
+                        (cv2.CAP_PROP_FPS, fps)):
+        if cap.get(prop) != value:
+            cap.set(prop, value)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # an idle warm camera must not hand back stale frames
+
+def open_camera(index=0, width=CAMERA_SIZE[0], height=CAMERA_SIZE[1], fps=CAMERA_FPS):
+    """
+    Open the webcam with the first capture API that works, or return None.
+    The working API is remembered, so later opens skip the probing.
+    """
+    candidates = camera_backends()
+    cached = _backends.get(index)
+    if cached is not None:
+        candidates = [cached] + [api for api in candidates if api != cached]
+    for api in candidates:
+        try:
+            cap = cv2.VideoCapture(index, api)
+        except cv2.error:
+            continue
+        if cap.isOpened():
+            _backends[index] = api
+            _configure(cap, width, height, fps)
+            return cap
+        cap.release()
+    _backends.pop(index, None)
+    return None
+
+
+class CameraService:
+    """
+    One webcam shared by consecutive sessions. warm_up() opens it on a
+    background thread and returns at once; when_ready(callback) reports the
+    outcome; acquire(owner) (camera thread) waits for it. release(owner)
+    keeps the device open for the next session and closes it after
+    `idle_timeout` seconds with no owner left. Owners are any hashable token
+    unique to a session, so a late release() from an earlier session can't
+    idle the camera under a newer one. close() on exit.
+    """
+
+    def __init__(self, index=0, idle_timeout=CAMERA_IDLE_TIMEOUT):
+        self.index = index
+        self.idle_timeout = idle_timeout
+        self.state = "closed"           # "closed", "opening", "ready" or "failed"
+        self.open_ms = None             # duration of the last open
+        self.cap = None
+        self._owners = set()            # tokens of the sessions holding the camera
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._idle_timer = None
+
+    def warm_up(self):
+        """Start opening the camera unless it is already open or opening."""
+        with self._lock:
+            self._cancel_idle()
+            if self.state in ("opening", "ready"):
+                return
+            self.state = "opening"
+            self._ready.clear()
+        threading.Thread(target=self._open, name="camera-open", daemon=True).start()
+
+    def _open(self):
+        start = time.perf_counter()
+        cap = open_camera(self.index) if CV2_AVAILABLE else None
+        with self._lock:
+            if self.state != "opening":     # closed while we were opening
+                callbacks = []
+            else:
+                self.cap, cap = cap, None
+                self.state = "ready" if self.cap is not None else "failed"
+                self.open_ms = (time.perf_counter() - start) * 1000
+                callbacks, self._callbacks = self._callbacks, []
+            self._ready.set()
+        if cap is not None:
+            cap.release()
+        for callback in callbacks:
+            callback(self.state == "ready")
+
+    def when_ready(self, callback):
+        """
+        Call callback(ok) once the pending open finishes, or now if none is
+        pending. It runs on the opening thread: Tk callers must hop with after().
+        """
+        with self._lock:
+            if self.state == "opening":
+                self._callbacks.append(callback)
+                return
+        callback(self.state == "ready")
+
+    @property
+    def in_use(self):
+        return bool(self._owners)
+
+    def acquire(self, owner, timeout=CAMERA_OPEN_TIMEOUT):
+        """
+        Block until the camera is open and register `owner` as a user; returns
+        the camera, or None if it failed or timed out.
+        """
+        self.warm_up()
+        if not self._ready.wait(timeout):
+            return None
+        with self._lock:
+            if self.state != "ready":
+                return None
+            self._cancel_idle()
+            self._owners.add(owner)
+            cap = self.cap
+        cap.grab()   # drop whatever frame sat in the driver while idle
+        return cap
+
+    def release(self, owner):
+        """
+        `owner` is done with the camera; once no owner is left keep it warm for
+        `idle_timeout`. Unknown owners (already released, or from before a
+        close()) are ignored.
+        """
+        with self._lock:
+            if owner not in self._owners:
+                return
+            self._owners.discard(owner)
+            if not self._owners and self.state == "ready" and self.idle_timeout is not None:
+                self._cancel_idle()
+                self._idle_timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    def _close_if_idle(self):
+        with self._lock:
+            if self._owners:
+                return
+        self.close()
+
+    def _cancel_idle(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def close(self):
+        with self._lock:
+            self._cancel_idle()
+            cap, self.cap = self.cap, None
+            self.state = "closed"
+            self._owners.clear()
+            self._ready.set()   # wake any acquire() still waiting; it sees "closed"
+        if cap is not None:
+            cap.release()
+
+
+# ---------- clocks ----------
+class RealClock:
+    """Wall-clock time. sleep() wakes early when `stop_event` is set."""
+
+    def __init__(self, stop_event=None):
+        self.stop_event = stop_event
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if self.stop_event is not None:
+            self.stop_event.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated time: sleep() advances now() instantly, so a replay runs as
+    fast as the CPU allows with the frame timing of a real run. With
+    charge_compute, time spent between sleeps (detection) is added too,
+    trading exact repeatability for realistic latencies.
+    """
+
+    def __init__(self, start=0.0, charge_compute=False):
+        self.t = start
+        self.charge_compute = charge_compute
+        self._mark = time.perf_counter()
+
+    def now(self):
+        if self.charge_compute:
+            return self.t + (time.perf_counter() - self._mark)
+        return self.t
+
+    def sleep(self, seconds):
+        self.t = self.now() + max(0.0, seconds)
+        self._mark = time.perf_counter()
+
+
+# ---------- replay sources ----------
+class FrameSource:
+    """
+    Base replay source. read(image=None) -> (ok, frame) returns the frame
+    due at the clock's current time (frames in between are dropped, as a
+    live camera would). Once the media ends, ok is False and `finished`
+    is True. absences() gives the ground truth as (start, end) seconds.
+    """
+    fps = float(CAMERA_FPS)
+
+    def __init__(self, clock=None):
+        self.clock = clock or RealClock()
+        self.start = None
+        self.finished = False
+        self._pos = -1                  # index of the last frame returned
+
+    def elapsed(self):
+        """Media seconds since the first read()."""
+        if self.start is None:
+            self.start = self.clock.now()
+        return self.clock.now() - self.start
+
+    def _due_index(self):
+        # never hand out the same frame twice; a fast reader just gets the next one
+        return max(int(self.elapsed() * self.fps), self._pos + 1)
+
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        raise NotImplementedError
+
+    def absences(self):
+        return []
+
+    def release(self):
+        pass
+
+
+class VideoFileSource(FrameSource):
+    """
+    A recorded clip. Ground truth comes from `absences` or, if omitted, from
+    '<clip>.absences.csv' next to it (rows 'start_sec,end_sec').
+    """
+
+    def __init__(self, path, clock=None, absences=None):
+        super().__init__(clock)
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or float(CAMERA_FPS)
+        if absences is None:
+            absences = _read_intervals(path + ".absences.csv")
+        self._absences = list(absences)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        idx = self._due_index()
+        while self._pos < idx - 1:
+            if not self.cap.grab():
+                self.finished = True
+                return False, None
+            self._pos += 1
+        ok, frame = self.cap.read(image) if image is not None else self.cap.read()
+        if not ok:
+            self.finished = True
+            return False, None
+        self._pos += 1
+        return True, frame
+
+    def absences(self):
+        return self._absences
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """
+    A directory of frames played at `fps`. With a labels.csv ('file,has_face',
+    as used by the face-detectors benchmark) it sets the order and ground
+    truth; otherwise image files play in name order without ground truth.
+    """
+
+    def __init__(self, directory, clock=None, fps=SYNTHETIC_FPS):
+        super().__init__(clock)
+        self.fps = float(fps)
+        self.files, self.labels = [], []
+        labels_path = os.path.join(directory, "labels.csv")
+        if os.path.exists(labels_path):
+            with open(labels_path, newline="") as f:
+                for row in csv.reader(f):
+                    if row and row[0] != "file":
+                        self.files.append(os.path.join(directory, row[0]))
+                        self.labels.append(row[1].strip() == "1")
+        else:
+            self.files = [os.path.join(directory, n) for n in sorted(os.listdir(directory))
+                          if n.lower().endswith(IMAGE_EXTENSIONS)]
+
+    def read(self, image=None):
+        idx = self._due_index()
+        if idx >= len(self.files):
+            self.finished = True
+            return False, None
+        self._pos = idx
+        frame = cv2.imread(self.files[idx])
+        if frame is None:
+            return False, None
+        if image is not None and image.shape == frame.shape:
+            image[...] = frame
+            return True, image
+        return True, frame
+
+    def absences(self):
+        return _runs(self.labels, self.fps)
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames following `script` ((seconds, present) segments): a
+    flickering background, plus a moving face while present. `face_box` is
+    where the face was drawn in the last frame (None when absent). The
+    cascade and DNN detectors need a real face, so pass a photo as
+    `face_image`; the default cartoon face is only meant for runs that use
+    face_box as the detector (timing and loop logic, not detection quality).
+    """
+
+    def __init__(self, script=DEFAULT_SCRIPT, clock=None, fps=SYNTHETIC_FPS, shape=SYNTHETIC_SHAPE, face_image=None):
+        super().__init__(clock)
+        self.script = tuple(script)
+        self.fps = float(fps)
+        self.shape = shape
+        self.duration = sum(seconds for seconds, _ in self.script)
+        self.face_box = None
+        h, w = shape[:2]
+        ramp = np.linspace(60, 160, w, dtype=np.uint8)
+        self._background = np.ascontiguousarray(np.broadcast_to(ramp[None, :, None], shape))
+        self._face = self._load_face(face_image, (w // 4, int(h * 0.45)))
+
+    def _load_face(self, path, size):
+        face = cv2.imread(path) if path else None
+        if face is None:
+            w, h = size
+            face = self._background[:h, :w].copy()
+            cv2.ellipse(face, (w // 2, h // 2), (w // 2 - 2, h // 2 - 2), 0, 0, 360, (140, 170, 215), -1)
+            for ex in (w // 3, 2 * w // 3):
+                cv2.circle(face, (ex, h * 2 // 5), max(2, w // 14), (40, 40, 40), -1)
+            cv2.ellipse(face, (w // 2, h * 2 // 3), (w // 6, h // 14), 0, 0, 180, (60, 60, 140), 3)
+        return cv2.resize(face, size)
+
+    def present_at(self, t):
+        for seconds, present in self.script:
+            if t < seconds:
+                return present
+            t -= seconds
+        return False
+
+    def read(self, image=None):
+        idx = self._due_index()
+        t = idx / self.fps
+        if t >= self.duration:
+            self.finished = True
+            return False, None
+        self._pos = idx
+        frame = image if image is not None and image.shape == self.shape else np.empty(self.shape, np.uint8)
+        # light flicker keeps the frames from being bit-identical, like a real sensor
+        frame[...] = self._background
+        frame += 2 * (idx % 3)
+        self.face_box = None
+        if self.present_at(t):
+            h, w = self.shape[:2]
+            fh, fw = self._face.shape[:2]
+            x = int((w - fw) / 2 + w * 0.08 * math.sin(t * 0.9))
+            y = int((h - fh) / 2 + h * 0.04 * math.sin(t * 1.7))
+            frame[y:y + fh, x:x + fw] = self._face
+            self.face_box = (x, y, fw, fh)
+        return True, frame
+
+    def absences(self):
+        intervals, t = [], 0.0
+        for seconds, present in self.script:
+            if not present:
+                intervals.append((t, t + seconds))
+            t += seconds
+        return intervals
+
+
+def _runs(labels, fps):
+    """(start, end) seconds of each run of False in per-frame `labels`."""
+    intervals, start = [], None
+    for i, present in enumerate(list(labels) + [True]):
+        if not present and start is None:
+            start = i
+        elif present and start is not None:
+            intervals.append((start / fps, i / fps)); start = None
+    return intervals
+
+def _read_intervals(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        return [(float(r[0]), float(r[1])) for r in csv.reader(f) if r and r[0][:1].isdigit()]
+
+
+class StreamReader:
+    """
+    Live capture (device or network stream) decoded continuously on its own
+    thread, so the driver/network buffer never backs up between polls.
+    read() returns the newest frame not returned before, waiting up to
+    `timeout` for one; None if none arrived or the stream ended.
+    """
+
+    def __init__(self, cap, name="stream"):
+        self.cap = cap
+        self.finished = False
+        self.decoded = 0
+        self._frame = None
+        self._seq = 0
+        self._taken = 0
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._decode, name=f"decode-{name}", daemon=True)
+        self._thread.start()
+
+    def _decode(self):
+        while not self.finished:
+            ok, frame = self.cap.read()
+            with self._cond:
+                if not ok:
+                    self.finished = True
+                else:
+                    self._frame = frame
+                    self._seq += 1
+                    self.decoded += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._taken or self.finished, timeout):
+                return None
+            if self._seq == self._taken:
+                return None
+            self._taken = self._seq
+            return self._frame
+
+    def release(self):
+        self.finished = True
+        self._thread.join(2.0)
+        self.cap.release()
+
+
+def open_source(spec, clock=None, face_image=None):
+    """
+    'synthetic', an image directory or a video file path -> FrameSource;
+    a device index ("0") or stream URL ("rtsp://...") -> an opened
+    cv2.VideoCapture (wrap it in StreamReader), or None if it did not open.
+    """
+    if spec.isdigit():
+        return open_camera(int(spec))
+    if "://" in spec:
+        cap = cv2.VideoCapture(spec)
+        return cap if cap.isOpened() else None
+    if spec == "synthetic":
+        return SyntheticSource(clock=clock, face_image=face_image)
+    if os.path.isdir(spec):
+        return ImageSequenceSource(spec, clock)
+    return VideoFileSource(spec, clock)
@@ -1,38 +1,306 @@
 # chatbot_manager.py
+# ollama and chatterbot are imported on first use, on the init thread started by
+# ChatbotManager.start(), so importing this module costs nothing at app startup.
 
-import ollama
+import re
+import time
+import hashlib
 import sqlite3
 import datetime
 import logging
-import spacy
-nlp = spacy.load("en_core_web_sm")
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
 
-from chatterbot import ChatBot
-from chatterbot.trainers import ListTrainer
+import database
 
 # This is essential to stop ChatterBot from spamming your console
 logging.basicConfig(level=logging.ERROR)
 
+OLLAMA_HOST = None              # None: the OLLAMA_HOST env var, else http://127.0.0.1:11434
+OLLAMA_MODEL = 'tinyllama'      # the small, fast model
+OLLAMA_KEEP_ALIVE = '30m'       # how long Ollama keeps the model loaded after each request
+OLLAMA_TIMEOUT = 120            # secs before a request to the server is abandoned
+LATENCY_HISTORY = 100           # replies kept in ChatStats
+CACHE_SIZE = 128                # Ollama replies kept in ResponseCache (0 disables it)
+CACHE_TTL = 600                 # secs a cached reply stays valid
+NEAR_DUPLICATE = False          # also reuse replies to prompts spaCy finds near-identical (loads SPACY_MODEL)
+NEAR_DUPLICATE_SIMILARITY = 0.95
+SPACY_MODEL = "en_core_web_sm"
+
+
+class ChatStats:
+    """
+    Latency of recent Ollama replies (thread-safe). Each sample has
+    ttft_ms (request to first text), total_ms, tokens and tokens_per_sec
+    (generation rate after the first token); snapshot() summarizes them.
+    """
+
+    def __init__(self, history=LATENCY_HISTORY):
+        self.samples = deque(maxlen=history)
+        self.warm_up_ms = None
+        self.cancelled = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def record(self, ttft, total, tokens, cancelled=False):
+        generating = total - ttft
+        sample = {"ttft_ms": ttft * 1000, "total_ms": total * 1000, "tokens": tokens,
+                  "tokens_per_sec": tokens / generating if generating > 0 else 0.0}
+        with self._lock:
+            self.samples.append(sample)
+            self.cancelled += cancelled
+        return sample
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = list(self.samples)
+            summary = {"replies": len(samples), "cancelled": self.cancelled, "failed": self.failed,
+                       "warm_up_ms": self.warm_up_ms, "last": samples[-1] if samples else None}
+        for key in ("ttft_ms", "total_ms", "tokens_per_sec"):
+            summary[f"mean_{key}"] = sum(s[key] for s in samples) / len(samples) if samples else None
+        return summary
+
+
+def normalize_prompt(prompt):
+    """Cache key form of a prompt: lower case, punctuation and extra spaces dropped."""
+    return " ".join(re.sub(r"[^\w\s]", " ", prompt.lower()).split())
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of finished Ollama replies (thread-safe). Entries are
+    keyed on the normalized prompt within a scope, (model, hash of the
+    stats context), so a reply is never reused once the user's data or
+    the model changes. With an `nlp` (spaCy) pipeline, a miss falls back
+    to the most similar cached prompt in the same scope if its similarity
+    is at least `similarity`. stats() reports the hit rate and the reply
+    time the hits saved.
+    """
+
+    def __init__(self, size=CACHE_SIZE, ttl=CACHE_TTL, similarity=NEAR_DUPLICATE_SIMILARITY, nlp=None):
+        self.size = size
+        self.ttl = ttl
+        self.similarity = similarity
+        self.nlp = nlp
+        self.entries = OrderedDict()   # (scope, normalized prompt) -> (reply, expires, cost secs, doc)
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.saved = 0.0
+        self._lock = threading.Lock()
+
+    def _doc(self, key):
+        nlp = self.nlp
+        return nlp(key) if nlp is not None and key else None
+
+    def get(self, prompt, scope):
+        if not self.size:
+            return None
+        key = normalize_prompt(prompt)
+        doc = None
+        with self._lock:
+            now = time.monotonic()
+            for stale in [k for k, entry in self.entries.items() if entry[1] <= now]:
+                del self.entries[stale]
+            entry = self.entries.get((scope, key))
+            if entry is not None:
+                self.entries.move_to_end((scope, key))
+                self.hits += 1
+                self.saved += entry[2]
+                return entry[0]
+            candidates = [(k, entry) for k, entry in self.entries.items() if k[0] == scope and entry[3] is not None]
+        if candidates:
+            doc = self._doc(key)
+        with self._lock:
+            best = max(((doc.similarity(entry[3]), k, entry) for k, entry in candidates),
+                       key=lambda c: c[0], default=None) if doc is not None else None
+            if best is not None and best[0] >= self.similarity and best[1] in self.entries:
+                self.entries.move_to_end(best[1])
+                self.hits += 1
+                self.near_hits += 1
+                self.saved += best[2][2]
+                return best[2][0]
+            self.misses += 1
+        return None
+
+    def put(self, prompt, scope, reply, cost):
+        if not self.size or not reply:
+            return
+        key = normalize_prompt(prompt)
+        doc = self._doc(key)
+        with self._lock:
+            self.entries[(scope, key)] = (reply, time.monotonic() + self.ttl, cost, doc)
+            self.entries.move_to_end((scope, key))
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self.entries), "hits": self.hits, "near_hits": self.near_hits,
+                    "misses": self.misses, "evicted": self.evicted,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "saved_ms": self.saved * 1000,
+                    "near_duplicate": self.nlp is not None}
+
+
+class StatsContext:
+    """
+    Per-user, per-day memo of database.user_summary() and the context text
+    built from it. An entry is reused until database.change_count() moves
+    (a session was written) or the date rolls over; `queries` counts the
+    recomputations.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.queries = 0
+        self._memo = {}   # user_id -> (day, change count, summary, text)
+        self._lock = threading.Lock()
+
+    def summary(self, user_id):
+        return self._entry(user_id)[2]
+
+    def get(self, user_id):
+        return self._entry(user_id)[3]
+
+    def _entry(self, user_id):
+        day = datetime.date.today()
+        changes = database.change_count()
+        with self._lock:
+            entry = self._memo.get(user_id)
+        if entry is not None and entry[0] == day and entry[1] == changes:
+            return entry
+        # read the count before querying: a write landing mid-query invalidates the result
+        summary = database.user_summary(user_id, day, path=self.db_path)
+        entry = (day, changes, summary, self.format(summary))
+        with self._lock:
+            self.queries += 1
+            self._memo[user_id] = entry
+        return entry
+
+    @staticmethod
+    def format(summary):
+        if not summary["today_sessions"] and not summary["week_sessions"]:
+            return "User has no session data yet for today."
+        rate = summary["completion_rate"]
+        return f"""
+            Here is a summary of the user's activity:
+            - Focus time today: {summary['today_focus_sec'] / 60:.0f} minutes in {summary['today_sessions']} sessions.
+            - Topic with most distractions today: {summary['top_distraction_topic'] or 'None'}.
+            - This week: {summary['week_focus_sec'] / 60:.0f} minutes over {summary['week_days_active']} days.
+            - Completed sessions (last {database.COMPLETION_WINDOW_DAYS} days): {f'{rate:.0%}' if rate is not None else 'n/a'}.
+            - Current streak: {summary['streak_days']} days with a completed session.
+            """
+
+
 class ChatbotManager:
     """
     Manages all chatbot logic, automatically switching between 
     a "True AI" (Ollama) and a "Simple AI" (ChatterBot) fallback.
     It also injects user data from the main app's database.
+
+    Construction is cheap; start() loads both engines on a background thread
+    and resolves the `ready` future (to the manager, or the init error).
+    get_response() waits for it, so call it off the Tk thread.
+
+    Ollama requests go through one ollama.Client (pooled HTTP connections)
+    that asks the server to keep the model loaded for `keep_alive`. Once
+    the server is found, a warm-up request loads the model in the
+    background (`warmed` resolves when it is done) so the first reply
+    doesn't pay for it. Reply latency is recorded in `stats` (ChatStats);
+    finished replies are reused from `cache` (ResponseCache) while the
+    stats context is unchanged.
     """
     
-    def __init__(self, main_db_path="mindanchor_data.sqlite3"):
+    def __init__(self, main_db_path="mindanchor_data.sqlite3", host=OLLAMA_HOST, model=OLLAMA_MODEL,
+                 keep_alive=OLLAMA_KEEP_ALIVE, warm_up=True):
         """
         Initializes the manager.
         - main_db_path: Path to the main app's SQLite database 
                           (where session/distraction logs are stored).
+        - host, model, keep_alive: Ollama server, model and keep-alive window.
+        - warm_up: load the model in the background as soon as the server is found.
         """
         self.db_path = main_db_path
+        self.user_id = None  # set by the GUI once the user profile exists; stats are per user
         self.ollama_available = False
-        self.chatterbot = self._setup_chatterbot()
+        self.chatterbot = None
+        self.host = host
+        self.model = model
+        self.keep_alive = keep_alive
+        self.warm_up = warm_up
+        self.stats = ChatStats()
+        self.cache = ResponseCache()
+        self.context = StatsContext(main_db_path)
+        self.ready = Future()
+        self.warmed = Future()
+        self._client = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Begin loading the engines in the background (idempotent); returns self."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._init_engines, name="chatbot-init", daemon=True)
+                self._thread.start()
+        return self
+
+    def is_ready(self):
+        return self.ready.done() and self.ready.exception() is None
+
+    def wait_ready(self, timeout=None):
+        """Block until the engines are loaded; re-raises the init error, if any."""
+        self.start()
+        return self.ready.result(timeout)
+
+    def _init_engines(self):
+        try:
+            self.chatterbot = self._setup_chatterbot()
+            self._detect_ollama()
+        except Exception as e:
+            print(f"ERROR: Chatbot init failed: {e}")
+            self.ready.set_exception(e)
+            self.warmed.set_result(False)
+            return
+        self.ready.set_result(self)
+        self._warm_up_model()
+        if NEAR_DUPLICATE and self.ollama_available:
+            self.cache.nlp = self._load_spacy()
+
+    def _warm_up_model(self):
+        """Load the model now (an empty prompt only loads it) instead of on the first question."""
+        if not (self.ollama_available and self.warm_up):
+            self.warmed.set_result(False)
+            return
+        start = time.perf_counter()
+        try:
+            self._client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+            self.stats.warm_up_ms = (time.perf_counter() - start) * 1000
+            self.warmed.set_result(True)
+        except Exception as e:
+            print(f"WARNING: Ollama warm-up failed: {e}")
+            self.warmed.set_result(False)
 
+    def _detect_ollama(self):
         # --- Test for Ollama Server ---
         try:
-            ollama.list() 
+            import ollama
+            client = ollama.Client(host=self.host, timeout=OLLAMA_TIMEOUT)
+            client.list() 
+            self._client = client
             self.ollama_available = True
             print("INFO: Ollama server detected. Chatbot running in 'Advanced' mode. 🚀")
         except Exception:
@@ -40,11 +308,22 @@ class ChatbotManager:
             print("WARNING: Ollama server not found. Falling back to 'Simple' chatbot mode.")
             print("         (Install & run Ollama for 'Advanced' AI features.)")
 
+    def _load_spacy(self):
+        try:
+            import spacy
+            return spacy.load(SPACY_MODEL)
+        except Exception as e:
+            print(f"WARNING: spaCy model '{SPACY_MODEL}' unavailable, near-duplicate matching is off: {e}")
+            return None
+
     def _setup_chatterbot(self):
         """
         Initializes the "Simple AI" fallback bot (ChatterBot).
         It uses its *own* separate database to store its brain.
         """
+        from chatterbot import ChatBot
+        from chatterbot.trainers import ListTrainer
+
         # This DB is just for the bot's *own* conversation knowledge
         bot_brain_db = 'sqlite:///chatterbot_brain.sqlite3'
         
@@ -72,101 +351,108 @@ class ChatbotManager:
 
     def _get_user_stats_context(self):
         """
-        Queries the *main app's database* (database.py) to get stats.
-        This string is what we "inject" into the AI's prompt.
+        The user's stats as text, for "injecting" into the AI's prompt.
+        Memoized by StatsContext: no queries unless the data or the day changed.
         """
-        context = "User has no session data yet for today."
-        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            today = str(datetime.date.today())
-            
-            # --- Query 1: Get total focus minutes today ---
-            # USES: duration_sec, start_time (from database.py schema)
-            cursor.execute(
-                "SELECT SUM(duration_sec) FROM sessions WHERE date(start_time) = ?", 
-                (today,)
-            )
-            focus_result = cursor.fetchone()
-            total_focus_secs = (focus_result[0] or 0)
-            total_focus_mins = total_focus_secs / 60
-
-            # --- Query 2: Get top distraction (topic) today ---
-            # USES: session_name, distractions (from database.py schema)
-            cursor.execute(
-                """
-                SELECT session_name, SUM(distractions) as total_d 
-                FROM sessions 
-                WHERE date(start_time) = ? AND distractions > 0
-                GROUP BY session_name
-                ORDER BY total_d DESC 
-                LIMIT 1
-                """, 
-                (today,)
-            )
-            distraction_result = cursor.fetchone()
-            top_distraction_topic = distraction_result[0] if distraction_result else "None"
-            
-            conn.close()
-
-            # --- Build the context string for the AI ---
-            context = f"""
-            Here is a summary of the user's activity today:
-            - Total Focus Time: {total_focus_mins:.0f} minutes.
-            - Topic with most distractions: {top_distraction_topic}.
-            """
-        
+            return self.context.get(self.user_id)
         except sqlite3.Error as e:
             print(f"DB READ ERROR: Could not get user stats: {e}")
             return "Database is not ready. No user stats available."
-        
-        return context
 
+    def _chat_messages(self, user_prompt):
+        # 1. Get the latest user data
+        stats_context = self._get_user_stats_context()
+        
+        # --- NEW, SIMPLIFIED PROMPT ---
+        system_prompt = f"""
+        You are 'Anchor', a friendly and motivating focus coach.
+        Keep all your answers very short (1-2 sentences).
+        
+        Here is the user's live data:
+        {stats_context}
+        
+        Use this data to inform your answers naturally.
+        """
+        # --- END NEW PROMPT ---
+        return [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': user_prompt}
+        ]
 
     def get_response(self, user_prompt):
         """
         This is the main function your app will call.
         It intelligently chooses the best engine to use.
+        Blocks until start()'s background init has finished.
         """
+        return "".join(self.stream_response(user_prompt))
+
+    def stream_response(self, user_prompt, cancel=None):
+        """
+        Generator version of get_response: yields the reply in pieces as
+        Ollama produces them (the ChatterBot fallback yields it whole).
+        Stops early, closing the HTTP stream, once `cancel` (a
+        threading.Event) is set; calling close() on the generator does the same.
+        """
+        self.wait_ready()
         
         if self.ollama_available:
             # --- PATH 1: "TRUE AI" (OLLAMA) ---
+            stream = None
+            first = None
+            tokens = 0
+            outcome = "cancelled"
             try:
-                # 1. Get the latest user data
-                stats_context = self._get_user_stats_context()
-                
-                # --- NEW, SIMPLIFIED PROMPT ---
-                system_prompt = f"""
-                You are 'Anchor', a friendly and motivating focus coach.
-                Keep all your answers very short (1-2 sentences).
-                
-                Here is the user's live data:
-                {stats_context}
-                
-                Use this data to inform your answers naturally.
-                """
-                # --- END NEW PROMPT ---
-
-                # 3. Call the Ollama server
-                response = ollama.chat(
-                    model='tinyllama',  # Use the small, fast model
-                    messages=[          
-                        {'role': 'system', 'content': system_prompt},
-                        {'role': 'user', 'content': user_prompt}
-                    ]
+                messages = self._chat_messages(user_prompt)
+                # same question, same model, same stats -> same answer
+                scope = (self.model, hashlib.sha1(messages[0]['content'].encode()).hexdigest())
+                cached = self.cache.get(user_prompt, scope)
+                if cached is not None:
+                    yield cached
+                    return
+                parts = []
+                # Call the Ollama server; tokens arrive as they are generated
+                start = time.perf_counter()
+                stream = self._client.chat(
+                    model=self.model,
+                    messages=messages,
+                    stream=True,
+                    keep_alive=self.keep_alive
                 )
-                return response['message']['content']
+                for chunk in stream:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    text = chunk['message']['content']
+                    if text:
+                        first = first or time.perf_counter()
+                        tokens += 1
+                        parts.append(text)
+                        yield text
+                    if chunk.get('done'):
+                        tokens = chunk.get('eval_count') or tokens
+                outcome = "done"
+                self.cache.put(user_prompt, scope, "".join(parts), time.perf_counter() - start)
+                return
             
             except Exception as e:
                 print(f"ERROR: Ollama call failed: {e}")
+                outcome = "failed"
+                self.stats.record_failure()
+                if first is not None:
+                    return   # part of the answer is already shown; don't append a second one
                 self.ollama_available = False 
+            finally:
+                if stream is not None and hasattr(stream, "close"):
+                    stream.close()   # drops the connection if we stopped early
+                if first is not None and outcome != "failed":
+                    self.stats.record(first - start, time.perf_counter() - start, tokens,
+                                      cancelled=outcome == "cancelled")
                 
         # --- PATH 2: "SIMPLE AI" (CHATTERBOT FALLBACK) ---
         prompt_lower = user_prompt.lower()
         if "stats" in prompt_lower or "how am i doing" in prompt_lower:
-            return self._get_user_stats_context()
+            yield self._get_user_stats_context()
+            return
         
-        return str(self.chatterbot.get_response(user_prompt))
-
+        yield str(self.chatterbot.get_response(user_prompt))
@@ -2,16 +2,366 @@
 # Updated DB helper for MindAnchor: supports user profiles, focus sessions, and AI logs
 
 import os
+import csv
+import json
+import time
+import datetime
+import queue
+import atexit
 import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 
 DB_PATH = os.path.join("data", "mindanchor_ai.db")
 
-def init_db():
-    """Initialize DB tables if not present."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+# ------------- connection layer -------------
+# Every statement used to open/commit/close its own connection in rollback-journal
+# mode. Instead we keep a small pool of long-lived WAL connections per DB file.
+POOL_SIZE = 4                   # idle connections kept open per DB file
+BUSY_TIMEOUT_MS = 5000          # wait this long on a locked DB before failing
+STATEMENT_CACHE_SIZE = 256      # prepared statements kept per connection
 
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",      # safe with WAL, skips the fsync per commit
+    "PRAGMA cache_size = -16000",       # ~16 MB page cache
+    "PRAGMA mmap_size = 268435456",     # 256 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+)
+
+
+class ConnectionPool:
+    """
+    Thread-aware pool of long-lived connections to one SQLite file.
+    A thread checks a connection out for the duration of a `connection()` block;
+    nested blocks on the same thread reuse the connection it already holds.
+    Statements are prepared once per connection and reused from sqlite3's
+    statement cache, so keep SQL text constant and pass values as parameters.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # isolation_level=None: autocommit, transactions are explicit (see transaction())
+        conn = sqlite3.connect(self.path,
+                               timeout=BUSY_TIMEOUT_MS / 1000,
+                               isolation_level=None,
+                               check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(path=None):
+    """Return the shared pool for `path` (defaults to DB_PATH)."""
+    key = os.path.abspath(path or DB_PATH)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key)
+        return pool
+
+@contextmanager
+def connection(path=None):
+    """Borrow a pooled connection (autocommit unless inside transaction())."""
+    with get_pool(path).connection() as conn:
+        yield conn
+
+@contextmanager
+def transaction(path=None):
+    """
+    Run the block in one write transaction and yield a cursor.
+    Commits on success, rolls back on error. Nested calls on the same thread
+    join the outer transaction.
+    """
+    with connection(path) as conn:
+        if conn.in_transaction:
+            yield conn.cursor()
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def close_all():
+    """Close every idle pooled connection (called at exit)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+# ------------- write-behind queue -------------
+# Writes issued from the Tk main thread go through a background writer so a slow
+# disk never stalls the UI. Writes that share a coalesce key (e.g. the same
+# session's distraction counter) collapse to the latest one before commit.
+WRITE_QUEUE_SIZE = 1024         # max pending writes before enqueue applies backpressure
+WRITE_BATCH_SIZE = 64           # commit once this many distinct writes are pending...
+WRITE_FLUSH_INTERVAL = 0.5      # ...or this many seconds after the first pending write
+WRITE_RETRY_INTERVAL = 0.25     # secs between commit attempts while the DB is busy/locked
+WRITE_BUSY_ATTEMPTS = 120       # busy retries (~30 s) before the pending batch is dropped and reported
+WRITE_STOP_ATTEMPTS = 20        # busy retries stop() makes before giving up on pending writes
+
+_FLUSH = object()
+_STOP = object()
+
+
+def _is_busy(error):
+    """True for the transient 'database is locked/busy' errors worth retrying."""
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+
+class WriteBehindQueue:
+    """
+    Background writer thread fed by a bounded queue.
+    `enqueue()` never touches the database; `flush()` blocks until everything
+    enqueued before it is committed, and returns False if any of it was
+    dropped. A busy/locked DB keeps the batch pending and retries it, up to
+    WRITE_BUSY_ATTEMPTS times (WRITE_STOP_ATTEMPTS once stopping) before the
+    batch is dropped; a batch with a bad write (e.g. a constraint violation)
+    is re-run one statement at a time so only that write is dropped.
+    """
+
+    def __init__(self, path=None, maxsize=WRITE_QUEUE_SIZE,
+                 batch_size=WRITE_BATCH_SIZE, interval=WRITE_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0            # writes discarded since the writer started
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, sql, params=(), key=None):
+        """
+        Queue one write. Later writes with the same `key` replace earlier
+        pending ones. Blocks only if the queue is full.
+        """
+        self._queue.put((key, sql, params))
+
+    def flush(self, timeout=None):
+        """
+        Wait until all previously enqueued writes are committed. Returns
+        False on timeout or if any of those writes had to be dropped.
+        """
+        if not self._thread.is_alive():
+            return True
+        done = Future()
+        self._queue.put((_FLUSH, done, None))
+        try:
+            return done.result(timeout)
+        except FutureTimeout:
+            return False
+
+    def stop(self, timeout=None):
+        """Flush pending writes and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put((_STOP, None, None))
+            self._thread.join(timeout)
+
+    def _run(self):
+        pending = {}        # key -> (sql, params); re-inserted on coalesce so order follows the latest write
+        waiters = []
+        deadline = None     # commit the pending batch by then
+        retry_at = None     # DB was busy: don't retry before then
+        attempts = 0
+        dropped = 0         # since the waiters were last released
+        running = True
+        while running or pending:
+            wake = retry_at if retry_at is not None else deadline
+            timeout = None if wake is None else max(0.0, wake - time.monotonic())
+            key = sql = None
+            if running:
+                try:
+                    key, sql, params = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    pass
+            elif timeout:
+                time.sleep(timeout)   # stopping: only retrying the busy batch
+            if key is _FLUSH:
+                waiters.append(sql)
+            elif key is _STOP:
+                running = False
+            elif sql is not None:
+                if key is None:
+                    key = object()
+                pending.pop(key, None)
+                pending[key] = (sql, params)
+                if deadline is None:
+                    deadline = time.monotonic() + self.interval
+            now = time.monotonic()
+            due = deadline is not None and now >= deadline
+            if (pending and (retry_at is None or now >= retry_at)
+                    and (due or waiters or not running or len(pending) >= self.batch_size)):
+                try:
+                    dropped += self._commit(list(pending.values()))
+                except sqlite3.Error as e:
+                    attempts += 1
+                    if attempts < (WRITE_BUSY_ATTEMPTS if running else WRITE_STOP_ATTEMPTS):
+                        retry_at = now + WRITE_RETRY_INTERVAL
+                        if attempts == 1:
+                            print("DB write-behind: database busy, will retry:", e)
+                        continue
+                    print(f"DB write-behind: gave up on {len(pending)} writes after {attempts} busy attempts:", e)
+                    dropped += len(pending)
+                    self.dropped += len(pending)
+                pending.clear(); deadline = None; retry_at = None; attempts = 0
+            if not pending:
+                deadline = None
+                for done in waiters:
+                    done.set_result(dropped == 0)
+                if waiters:
+                    dropped = 0
+                waiters = []
+        for done in waiters:
+            done.set_result(dropped == 0)
+
+    def _commit(self, writes):
+        """
+        Commit `writes` in one transaction and return how many were dropped.
+        Raises sqlite3.Error when the DB is busy (nothing is committed then).
+        """
+        # Runs of the same statement (e.g. event appends) go through one executemany
+        try:
+            with transaction(self.path) as cur:
+                i = 0
+                while i < len(writes):
+                    sql = writes[i][0]; j = i
+                    while j < len(writes) and writes[j][0] == sql:
+                        j += 1
+                    cur.executemany(sql, [params for _, params in writes[i:j]])
+                    i = j
+            bump_changes()
+            return 0
+        except sqlite3.Error as e:
+            if _is_busy(e):
+                raise
+            print("DB write-behind error, retrying the batch one write at a time:", e)
+        # One savepoint per write: a bad write is rolled back alone, the rest commit
+        dropped = 0
+        with transaction(self.path) as cur:
+            for sql, params in writes:
+                cur.execute("SAVEPOINT write")
+                try:
+                    cur.execute(sql, params)
+                except sqlite3.Error as e:
+                    if _is_busy(e):
+                        raise
+                    cur.execute("ROLLBACK TO write")
+                    dropped += 1
+                    print(f"DB write-behind: dropped {sql.split()[0]} {params!r}:", e)
+                cur.execute("RELEASE write")
+        self.dropped += dropped
+        bump_changes()
+        return dropped
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return the shared write-behind queue, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindQueue()
+        return _writer
+
+def flush_writes(timeout=None):
+    """
+    Block until queued writes are durable. Returns False on timeout or if
+    any queued write was dropped (see WriteBehindQueue).
+    """
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
+
+def shutdown():
+    """Drain the write-behind queue and close pooled connections."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+    close_all()
+
+atexit.register(shutdown)
+
+# ------------- change counter -------------
+# Bumped after every committed write that can change session stats, so readers
+# that memoize derived stats (chatbot_manager.StatsContext) revalidate with one
+# integer compare instead of re-running their queries.
+_changes = 0
+_changes_lock = threading.Lock()
+
+def bump_changes():
+    global _changes
+    with _changes_lock:
+        _changes += 1
+        return _changes
+
+def change_count():
+    return _changes
+
+# ------------- schema & migrations -------------
+# The schema version lives in PRAGMA user_version. Each migration moves the DB
+# from version N-1 to N inside its own transaction. Installs created before
+# versioning report 0 and already have the v1 tables, hence IF NOT EXISTS there.
+def _migration_1_base_tables(cur):
     # Users table
     cur.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -56,57 +406,778 @@ def init_db():
         )
     """)
 
-    conn.commit()
-    conn.close()
+def _migration_2_session_indexes(cur):
+    # Per-user lookups: today's stats (range on start_time) and latest sessions
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_start ON sessions(user_id, start_time)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id, id DESC)")
 
-def save_user(name, country, age, gender, interest):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+def _migration_3_daily_stats(cur):
+    # Per (user, day, topic) rollup kept current by triggers on sessions
+    cur.execute(DAILY_STATS_TABLE_SQL)
+    for trigger_sql in DAILY_STATS_TRIGGERS:
+        cur.execute(trigger_sql)
+    rebuild_daily_stats(cur)
+
+def _migration_4_distraction_events(cur):
+    # Append-only log of individual distractions (timeline analytics)
     cur.execute("""
-        INSERT INTO users (name, country, age, gender, interest)
-        VALUES (?, ?, ?, ?, ?)
-    """, (name, country, age, gender, interest))
-    conn.commit()
-    uid = cur.lastrowid
-    conn.close()
-    return uid
+        CREATE TABLE IF NOT EXISTS distraction_events (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER NOT NULL,
+            ts TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            payload TEXT,
+            FOREIGN KEY(session_id) REFERENCES sessions(id)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_distraction_events_session ON distraction_events(session_id, ts)")
+
+def _migration_5_hour_stats(cur):
+    # Per (user, topic, start hour) rollup for the analytics report, kept current by triggers
+    cur.execute(HOUR_STATS_TABLE_SQL.format(schema=""))
+    for trigger_sql in HOUR_STATS_TRIGGERS:
+        cur.execute(trigger_sql)
+    rebuild_hour_stats(cur)
+
+# Append only; never reorder or edit a migration that has shipped.
+MIGRATIONS = (
+    _migration_1_base_tables,
+    _migration_2_session_indexes,
+    _migration_3_daily_stats,
+    _migration_4_distraction_events,
+    _migration_5_hour_stats,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def schema_version(path=None):
+    with connection(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(path=None, target=SCHEMA_VERSION):
+    """Apply pending migrations up to `target` and return the resulting version."""
+    while True:
+        with transaction(path) as cur:
+            # re-read under the write lock so concurrent launches don't double-apply
+            version = cur.execute("PRAGMA user_version").fetchone()[0]
+            if version >= target:
+                return version
+            MIGRATIONS[version](cur)
+            cur.execute(f"PRAGMA user_version = {version + 1}")
+
+def init_db(path=None):
+    """Bring the DB schema up to date. A current DB costs one pragma read."""
+    if schema_version(path) >= SCHEMA_VERSION:
+        return
+    migrate(path)
+
+# ------------- daily rollup -------------
+# daily_stats holds one row per (user, day, topic) so per-day stats read a handful
+# of rows instead of aggregating sessions. Sessions without start_time are not
+# rolled up; a missing user_id/session_name is keyed as 0/''.
+DAILY_STATS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        focus_sec INTEGER NOT NULL DEFAULT 0,
+        distractions INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, topic)
+    ) WITHOUT ROWID
+"""
+
+def _rollup_add(row):
+    return f"""
+        INSERT INTO daily_stats (user_id, day, topic, sessions, focus_sec, distractions, completed)
+        VALUES (IFNULL({row}.user_id, 0), substr({row}.start_time, 1, 10), IFNULL({row}.session_name, ''),
+                1, IFNULL({row}.duration_sec, 0), IFNULL({row}.distractions, 0), IFNULL({row}.completed, 0))
+        ON CONFLICT (user_id, day, topic) DO UPDATE SET
+            sessions = sessions + excluded.sessions,
+            focus_sec = focus_sec + excluded.focus_sec,
+            distractions = distractions + excluded.distractions,
+            completed = completed + excluded.completed;
+    """
+
+def _rollup_remove(row):
+    key = (f"user_id = IFNULL({row}.user_id, 0) AND day = substr({row}.start_time, 1, 10)"
+           f" AND topic = IFNULL({row}.session_name, '')")
+    return f"""
+        UPDATE daily_stats SET
+            sessions = sessions - 1,
+            focus_sec = focus_sec - IFNULL({row}.duration_sec, 0),
+            distractions = distractions - IFNULL({row}.distractions, 0),
+            completed = completed - IFNULL({row}.completed, 0)
+        WHERE {key};
+        DELETE FROM daily_stats WHERE {key} AND sessions <= 0;
+    """
+
+_ROLLUP_COLUMNS = "user_id, session_name, duration_sec, distractions, completed, start_time"
+DAILY_STATS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS trg_daily_stats_insert AFTER INSERT ON sessions
+        WHEN NEW.start_time IS NOT NULL BEGIN {_rollup_add("NEW")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_daily_stats_update_old AFTER UPDATE OF {_ROLLUP_COLUMNS} ON sessions
+        WHEN OLD.start_time IS NOT NULL BEGIN {_rollup_remove("OLD")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_daily_stats_update_new AFTER UPDATE OF {_ROLLUP_COLUMNS} ON sessions
+        WHEN NEW.start_time IS NOT NULL BEGIN {_rollup_add("NEW")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_daily_stats_delete AFTER DELETE ON sessions
+        WHEN OLD.start_time IS NOT NULL BEGIN {_rollup_remove("OLD")} END""",
+)
+
+DAILY_STATS_TRIGGER_NAMES = ("trg_daily_stats_insert", "trg_daily_stats_update_old",
+                             "trg_daily_stats_update_new", "trg_daily_stats_delete")
+
+RECOMPUTE_DAILY_STATS_SQL = """
+    SELECT IFNULL(user_id, 0), substr(start_time, 1, 10), IFNULL(session_name, ''),
+           COUNT(*), SUM(IFNULL(duration_sec, 0)), SUM(IFNULL(distractions, 0)), SUM(IFNULL(completed, 0))
+    FROM sessions
+    WHERE start_time IS NOT NULL
+    GROUP BY 1, 2, 3
+"""
+
+def rebuild_daily_stats(cur):
+    """Recompute daily_stats from sessions inside the caller's transaction."""
+    cur.execute("DELETE FROM daily_stats")
+    cur.execute("INSERT INTO daily_stats (user_id, day, topic, sessions, focus_sec, distractions, completed) "
+                + RECOMPUTE_DAILY_STATS_SQL)
+
+@contextmanager
+def rollup_suspended(path=None):
+    """
+    Bulk-load helper: drop the daily_stats and hour_stats triggers for the
+    block, then recreate them and rebuild both rollups once. Writers
+    elsewhere should be idle.
+    """
+    with transaction(path) as cur:
+        for name in DAILY_STATS_TRIGGER_NAMES + HOUR_STATS_TRIGGER_NAMES:
+            cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        with transaction(path) as cur:
+            for trigger_sql in DAILY_STATS_TRIGGERS + HOUR_STATS_TRIGGERS:
+                cur.execute(trigger_sql)
+            rebuild_daily_stats(cur)
+            rebuild_hour_stats(cur)
+
+def check_daily_stats(path=None):
+    """
+    Compare daily_stats with a full recompute from sessions.
+    Returns a list of (key, rollup values, expected values); empty means consistent.
+    """
+    return _check_rollup(RECOMPUTE_DAILY_STATS_SQL,
+                         "SELECT user_id, day, topic, sessions, focus_sec, distractions, completed FROM daily_stats",
+                         path)
+
+def _check_rollup(recompute_sql, rollup_sql, path=None):
+    with connection(path) as conn:
+        expected = {tuple(r[:3]): tuple(r[3:]) for r in conn.execute(recompute_sql)}
+        actual = {tuple(r[:3]): tuple(r[3:]) for r in conn.execute(rollup_sql)}
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys(), key=repr):
+        if expected.get(key) != actual.get(key):
+            mismatches.append((key, actual.get(key), expected.get(key)))
+    return mismatches
+
+# ------------- topic/hour rollup -------------
+# hour_stats holds one row per (user, topic, start hour) so the analytics report
+# (totals, per-topic and per-hour breakdowns) reads a few hundred rows instead of
+# a user's whole history. Unlike daily_stats it covers every session; sessions
+# without start_time count under hour -1. Archive files carry their own copy.
+HOUR_STATS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {schema}hour_stats (
+        user_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        hour INTEGER NOT NULL,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        focus_sec INTEGER NOT NULL DEFAULT 0,
+        distractions INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, topic, hour)
+    ) WITHOUT ROWID
+"""
+
+def _hour(prefix=""):
+    return f"IFNULL(CAST(substr({prefix}start_time, 12, 2) AS INTEGER), -1)"
+
+def _hour_rollup_add(row):
+    return f"""
+        INSERT INTO hour_stats (user_id, topic, hour, sessions, focus_sec, distractions, completed)
+        VALUES (IFNULL({row}.user_id, 0), IFNULL({row}.session_name, ''), {_hour(row + ".")},
+                1, IFNULL({row}.duration_sec, 0), IFNULL({row}.distractions, 0), IFNULL({row}.completed, 0))
+        ON CONFLICT (user_id, topic, hour) DO UPDATE SET
+            sessions = sessions + excluded.sessions,
+            focus_sec = focus_sec + excluded.focus_sec,
+            distractions = distractions + excluded.distractions,
+            completed = completed + excluded.completed;
+    """
+
+def _hour_rollup_remove(row):
+    key = (f"user_id = IFNULL({row}.user_id, 0) AND topic = IFNULL({row}.session_name, '')"
+           f" AND hour = {_hour(row + '.')}")
+    return f"""
+        UPDATE hour_stats SET
+            sessions = sessions - 1,
+            focus_sec = focus_sec - IFNULL({row}.duration_sec, 0),
+            distractions = distractions - IFNULL({row}.distractions, 0),
+            completed = completed - IFNULL({row}.completed, 0)
+        WHERE {key};
+        DELETE FROM hour_stats WHERE {key} AND sessions <= 0;
+    """
+
+HOUR_STATS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS trg_hour_stats_insert AFTER INSERT ON sessions
+        BEGIN {_hour_rollup_add("NEW")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_hour_stats_update AFTER UPDATE OF {_ROLLUP_COLUMNS} ON sessions
+        BEGIN {_hour_rollup_remove("OLD")} {_hour_rollup_add("NEW")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_hour_stats_delete AFTER DELETE ON sessions
+        BEGIN {_hour_rollup_remove("OLD")} END""",
+)
+
+HOUR_STATS_TRIGGER_NAMES = ("trg_hour_stats_insert", "trg_hour_stats_update", "trg_hour_stats_delete")
+
+def recompute_hour_stats_sql(schema="main"):
+    """hour_stats rows recomputed from `schema`.sessions (also used on archive files)."""
+    return f"""
+        SELECT IFNULL(user_id, 0), IFNULL(session_name, ''), {_hour("")},
+               COUNT(*), SUM(IFNULL(duration_sec, 0)), SUM(IFNULL(distractions, 0)), SUM(IFNULL(completed, 0))
+        FROM {schema}.sessions
+        GROUP BY 1, 2, 3
+    """
+
+def rebuild_hour_stats(cur, schema="main"):
+    """Recompute `schema`.hour_stats from its sessions inside the caller's transaction."""
+    cur.execute(f"DELETE FROM {schema}.hour_stats")
+    cur.execute(f"INSERT INTO {schema}.hour_stats (user_id, topic, hour, sessions, focus_sec, distractions, completed) "
+                + recompute_hour_stats_sql(schema))
+
+def check_hour_stats(path=None):
+    """Like check_daily_stats(), for hour_stats."""
+    return _check_rollup(recompute_hour_stats_sql(),
+                         "SELECT user_id, topic, hour, sessions, focus_sec, distractions, completed FROM hour_stats",
+                         path)
+
+# ------------- helpers -------------
+INSERT_USER_SQL = """
+    INSERT INTO users (name, country, age, gender, interest)
+    VALUES (?, ?, ?, ?, ?)
+"""
+INSERT_SESSION_SQL = """
+    INSERT INTO sessions (user_id, session_name, duration_sec, distractions, completed, ai_comment)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+START_SESSION_SQL = """
+    INSERT INTO sessions (user_id, session_name, duration_sec, distractions, completed, start_time)
+    VALUES (?, ?, ?, 0, 0, ?)
+"""
+UPDATE_DISTRACTIONS_SQL = "UPDATE sessions SET distractions = ? WHERE id = ?"
+INSERT_DISTRACTION_EVENT_SQL = "INSERT INTO distraction_events (session_id, ts, reason, payload) VALUES (?, ?, ?, ?)"
+RECONCILE_DISTRACTIONS_SQL = """
+    UPDATE sessions
+    SET distractions = (SELECT COUNT(*) FROM distraction_events WHERE session_id = ?)
+    WHERE id = ?
+"""
+FETCH_DISTRACTION_EVENTS_SQL = """
+    SELECT ts, reason, payload
+    FROM distraction_events
+    WHERE session_id = ?
+    ORDER BY ts, id
+"""
+FINALIZE_SESSION_SQL = "UPDATE sessions SET duration_sec = ?, completed = ?, end_time = ? WHERE id = ?"
+INSERT_AI_LOG_SQL = """
+    INSERT INTO ai_logs (user_id, session_id, focus_score, recommended_duration)
+    VALUES (?, ?, ?, ?)
+"""
+FETCH_SESSIONS_SQL = """
+    SELECT id, session_name, duration_sec, distractions, completed, created_at, ai_comment
+    FROM sessions
+    WHERE user_id = ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+DAILY_STATS_SQL = """
+    SELECT topic, sessions, focus_sec, distractions, completed
+    FROM daily_stats
+    WHERE user_id = ? AND day = ?
+"""
+
+def save_user(name, country, age, gender, interest):
+    with transaction() as cur:
+        cur.execute(INSERT_USER_SQL, (name, country, age, gender, interest))
+        return cur.lastrowid
 
 def save_session(user_id, session_name, duration_sec, distractions, completed, ai_comment=None):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO sessions (user_id, session_name, duration_sec, distractions, completed, ai_comment)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (user_id, session_name, duration_sec, distractions, int(bool(completed)), ai_comment))
-    conn.commit()
-    sid = cur.lastrowid
-    conn.close()
-    return sid
+    with transaction() as cur:
+        cur.execute(INSERT_SESSION_SQL,
+                    (user_id, session_name, duration_sec, distractions, int(bool(completed)), ai_comment))
+    bump_changes()
+    return cur.lastrowid
+
+def start_session(user_id, session_name, duration_sec, start_time):
+    """Create the live row for a focus session and return its id."""
+    with transaction() as cur:
+        cur.execute(START_SESSION_SQL, (user_id, session_name, duration_sec, start_time))
+    bump_changes()
+    return cur.lastrowid
+
+def update_session_distractions(session_id, distractions):
+    with transaction() as cur:
+        cur.execute(UPDATE_DISTRACTIONS_SQL, (distractions, session_id))
+    bump_changes()
+
+def enqueue_session_distractions(session_id, distractions):
+    """Non-blocking version of update_session_distractions (write-behind)."""
+    get_writer().enqueue(UPDATE_DISTRACTIONS_SQL, (distractions, session_id),
+                         key=("distractions", session_id))
+
+def enqueue_distraction_event(session_id, reason, payload=None, ts=None):
+    """
+    Append one distraction event (write-behind). Events are inserted with
+    executemany per batch, and sessions.distractions is reconciled from the
+    event count once per batch rather than updated per event. A later
+    enqueue_session_distractions for the same session (a manual override)
+    supersedes the pending reconcile.
+    """
+    ts = ts or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    payload = json.dumps(payload) if payload is not None else None
+    writer = get_writer()
+    writer.enqueue(INSERT_DISTRACTION_EVENT_SQL, (session_id, ts, reason, payload))
+    writer.enqueue(RECONCILE_DISTRACTIONS_SQL, (session_id, session_id),
+                   key=("distractions", session_id))
+
+def fetch_distraction_events(session_id):
+    """Return (ts, reason, payload) for a session's distractions in time order."""
+    with connection() as conn:
+        rows = conn.execute(FETCH_DISTRACTION_EVENTS_SQL, (session_id,)).fetchall()
+    return [(ts, reason, json.loads(payload) if payload else None) for ts, reason, payload in rows]
+
+def finalize_session(session_id, duration_sec, completed, end_time):
+    with transaction() as cur:
+        cur.execute(FINALIZE_SESSION_SQL, (duration_sec, int(bool(completed)), end_time, session_id))
+    bump_changes()
 
 def save_ai_log(user_id, session_id, focus_score, recommended_duration):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO ai_logs (user_id, session_id, focus_score, recommended_duration)
-        VALUES (?, ?, ?, ?)
-    """, (user_id, session_id, focus_score, recommended_duration))
-    conn.commit()
-    conn.close()
+    with transaction() as cur:
+        cur.execute(INSERT_AI_LOG_SQL, (user_id, session_id, focus_score, recommended_duration))
 
 def fetch_sessions_for_user(user_id, limit=10):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT id, session_name, duration_sec, distractions, completed, created_at, ai_comment
-        FROM sessions
-        WHERE user_id = ?
-        ORDER BY id DESC
-        LIMIT ?
-    """, (user_id, limit))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    with connection() as conn:
+        return conn.execute(FETCH_SESSIONS_SQL, (user_id, limit)).fetchall()
+
+def fetch_daily_stats(user_id, day=None, path=None):
+    """
+    Return one user's per-topic rollup rows for `day` (default: today) as
+    (topic, sessions, focus_sec, distractions, completed).
+    """
+    day = (day or datetime.date.today()).isoformat()
+    with connection(path) as conn:
+        return conn.execute(DAILY_STATS_SQL, (user_id or 0, day)).fetchall()
+
+def fetch_day_stats(user_id, day=None, path=None):
+    """
+    Return (total focus seconds, topic with most distractions or None)
+    for one user's sessions started on `day` (default: today).
+    """
+    rows = fetch_daily_stats(user_id, day, path)
+    total = sum(r[2] for r in rows)
+    distracted = [r for r in rows if r[3] > 0]
+    top = max(distracted, key=lambda r: r[3])[0] if distracted else None
+    return total, top
+
+STREAK_LOOKBACK_DAYS = 366      # longest streak user_summary() can report
+SUMMARY_WEEK_DAYS = 7           # "this week" = today and the 6 days before it
+COMPLETION_WINDOW_DAYS = 30     # completion rate is over this many days
+
+DAY_TOTALS_SQL = """
+    SELECT day, SUM(sessions), SUM(focus_sec), SUM(distractions), SUM(completed)
+    FROM daily_stats
+    WHERE user_id = ? AND day > ? AND day <= ?
+    GROUP BY day
+    ORDER BY day DESC
+"""
+
+def user_summary(user_id, day=None, path=None):
+    """
+    Precomputed stats for one user as of `day` (default: today), from the
+    daily_stats rollup in two queries: today's focus/sessions/top topic,
+    the week's totals, the completion rate over COMPLETION_WINDOW_DAYS and
+    the current streak (consecutive days with a completed session, counted
+    from yesterday if today has none yet).
+    """
+    day = day or datetime.date.today()
+    since = (day - datetime.timedelta(days=STREAK_LOOKBACK_DAYS)).isoformat()
+    with connection(path) as conn:
+        days = conn.execute(DAY_TOTALS_SQL, (user_id or 0, since, day.isoformat())).fetchall()
+    today_focus, top = fetch_day_stats(user_id, day, path)
+
+    def window(n):
+        start = (day - datetime.timedelta(days=n)).isoformat()
+        return [r for r in days if r[0] > start]
+    week = window(SUMMARY_WEEK_DAYS)
+    recent = window(COMPLETION_WINDOW_DAYS)
+    sessions = sum(r[1] for r in recent)
+
+    completed_days = {r[0] for r in days if r[4] > 0}
+    cursor = day if day.isoformat() in completed_days else day - datetime.timedelta(days=1)
+    streak = 0
+    while cursor.isoformat() in completed_days:
+        streak += 1
+        cursor -= datetime.timedelta(days=1)
+
+    today = days[0] if days and days[0][0] == day.isoformat() else (day.isoformat(), 0, 0, 0, 0)
+    return {"day": day.isoformat(),
+            "today_focus_sec": today_focus, "today_sessions": today[1], "today_distractions": today[3],
+            "top_distraction_topic": top,
+            "week_focus_sec": sum(r[2] for r in week), "week_sessions": sum(r[1] for r in week),
+            "week_days_active": len(week),
+            "completion_rate": sum(r[4] for r in recent) / sessions if sessions else None,
+            "streak_days": streak}
+
+# ------------- archive tiering -------------
+# Sessions older than the horizon move (with their ai_logs and distraction
+# events) into one archive file per month next to the hot DB, e.g.
+# data/archive/mindanchor_2024-03.db. Day-to-day queries only see the hot file;
+# full-history readers use history(), which ATTACHes the archives behind views.
+ARCHIVE_HORIZON_DAYS = 180
+ARCHIVED_TABLES = ("sessions", "ai_logs", "distraction_events")
+
+_SESSION_DAY = "COALESCE(start_time, created_at)"
+
+def archive_dir(path=None):
+    return os.path.join(os.path.dirname(os.path.abspath(path or DB_PATH)), "archive")
+
+def archive_files(path=None, since=None):
+    """Return {month: file} for existing archives, optionally from `since` ('YYYY-MM') on."""
+    directory = archive_dir(path)
+    if not os.path.isdir(directory):
+        return {}
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("mindanchor_") and name.endswith(".db"):
+            month = name[len("mindanchor_"):-len(".db")]
+            if since is None or month >= since:
+                files[month] = os.path.join(directory, name)
+    return files
+
+def _table_columns(conn, table, schema="main"):
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+def _archive_month(conn, month, cutoff, archive_file):
+    conn.execute("ATTACH DATABASE ? AS arch", (archive_file,))
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ARCHIVED_TABLES:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS arch.{table} AS SELECT * FROM main.{table} WHERE 0")
+                conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS arch.uq_{table}_id ON {table}(id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS arch.idx_sessions_user_start ON sessions(user_id, start_time)")
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS moving (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.moving")
+            conn.execute(f"""INSERT INTO temp.moving SELECT id FROM main.sessions
+                             WHERE {_SESSION_DAY} < ? AND substr({_SESSION_DAY}, 1, 7) = ?""", (cutoff, month))
+            moved = conn.execute("SELECT COUNT(*) FROM temp.moving").fetchone()[0]
+            filters = {"sessions": "id IN (SELECT id FROM temp.moving)",
+                       "ai_logs": "session_id IN (SELECT id FROM temp.moving)",
+                       "distraction_events": "session_id IN (SELECT id FROM temp.moving)"}
+            # copy first, delete children before parents; OR IGNORE makes a retried month idempotent
+            for table in ARCHIVED_TABLES:
+                cols = ", ".join(_table_columns(conn, table, "arch"))
+                conn.execute(f"INSERT OR IGNORE INTO arch.{table} ({cols}) SELECT {cols} FROM main.{table} WHERE {filters[table]}")
+            for table in reversed(ARCHIVED_TABLES):
+                conn.execute(f"DELETE FROM main.{table} WHERE {filters[table]}")
+            conn.execute(HOUR_STATS_TABLE_SQL.format(schema="arch."))
+            rebuild_hour_stats(conn, "arch")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.rollback()
+            raise
+        return moved
+    finally:
+        conn.execute("DETACH DATABASE arch")
+
+def archive_old_sessions(horizon_days=ARCHIVE_HORIZON_DAYS, path=None):
+    """
+    Move sessions that started more than `horizon_days` ago into per-month
+    archive files. Returns {month: sessions moved}. The daily_stats triggers
+    drop the moved rows from the hot rollup.
+    """
+    flush_writes()
+    cutoff = (datetime.date.today() - datetime.timedelta(days=horizon_days)).isoformat()
+    os.makedirs(archive_dir(path), exist_ok=True)
+    moved = {}
+    with connection(path) as conn:
+        months = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT substr({_SESSION_DAY}, 1, 7) FROM sessions WHERE {_SESSION_DAY} < ?", (cutoff,))]
+        for month in months:
+            target = os.path.join(archive_dir(path), f"mindanchor_{month}.db")
+            moved[month] = _archive_month(conn, month, cutoff, target)
+        if moved:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    if moved:
+        bump_changes()
+    return moved
+
+HOUR_STATS_COLUMNS = ("user_id", "topic", "hour", "sessions", "focus_sec", "distractions", "completed")
+
+def _archive_select(conn, table, cols, schema):
+    present = set(_table_columns(conn, table, schema))
+    if table == "hour_stats" and not present:
+        # archived before hour_stats existed: aggregate the month's sessions instead
+        return recompute_hour_stats_sql(schema) if _table_columns(conn, "sessions", schema) else None
+    if not present:
+        return None
+    return f"SELECT {', '.join(c if c in present else 'NULL' for c in cols)} FROM {schema}.{table}"
+
+def _user_rows(select, table, schema, user_id):
+    """`select` narrowed to one user's rows (events go by their session's user)."""
+    if user_id is None:
+        return select
+    if table == "distraction_events":
+        where = f"session_id IN (SELECT id FROM {schema}.sessions WHERE user_id = {int(user_id)})"
+    else:
+        where = f"user_id = {int(user_id)}"
+    return f"SELECT * FROM ({select}) WHERE {where}"
+
+HISTORY_TABLES = ARCHIVED_TABLES + ("hour_stats",)
+
+@contextmanager
+def history(path=None, since=None, tables=HISTORY_TABLES, user_id=None):
+    """
+    Yield a dedicated read connection where all_sessions, all_ai_logs,
+    all_distraction_events and all_hour_stats (only those in `tables`) are
+    UNION ALL views over the hot DB and every archive month from `since`
+    ('YYYY-MM') on; all_hour_stats repeats a key once per file, so SUM it.
+    With `user_id` the views hold only that user's rows. Up to SQLite's
+    ATTACH limit the views read the archive files directly; beyond it the
+    archives are attached that many at a time and the requested rows are
+    copied into temp tables behind the same views, so any number of months
+    works. Ask for only the tables and user you read: that copy is the cost.
+    """
+    conn = sqlite3.connect(os.path.abspath(path or DB_PATH), isolation_level=None)
+    try:
+        files = list(archive_files(path, since).values())
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        columns = {table: (list(HOUR_STATS_COLUMNS) if table == "hour_stats" else _table_columns(conn, table))
+                   for table in tables}
+        selects = {table: [_user_rows(f"SELECT {', '.join(cols)} FROM main.{table}", table, "main", user_id)]
+                   for table, cols in columns.items()}
+
+        def archive_selects(schema):
+            for table, cols in columns.items():
+                select = _archive_select(conn, table, cols, schema)
+                if select:
+                    yield table, _user_rows(select, table, schema, user_id)
+
+        if len(files) <= limit:
+            for i, archive_file in enumerate(files):
+                conn.execute(f"ATTACH DATABASE ? AS a{i}", (archive_file,))
+                for table, select in archive_selects(f"a{i}"):
+                    selects[table].append(select)
+        else:
+            for table, cols in columns.items():
+                conn.execute(f"CREATE TEMP TABLE archived_{table} AS SELECT {', '.join(cols)} FROM main.{table} WHERE 0")
+                selects[table].append(f"SELECT {', '.join(cols)} FROM temp.archived_{table}")
+            for start in range(0, len(files), limit):
+                group = files[start:start + limit]
+                for i, archive_file in enumerate(group):
+                    conn.execute(f"ATTACH DATABASE ? AS a{i}", (archive_file,))
+                conn.execute("BEGIN")
+                for i in range(len(group)):
+                    for table, select in archive_selects(f"a{i}"):
+                        conn.execute(f"INSERT INTO temp.archived_{table} {select}")
+                conn.execute("COMMIT")
+                for i in range(len(group)):
+                    conn.execute(f"DETACH DATABASE a{i}")
+        for table in columns:
+            conn.execute(f"CREATE TEMP VIEW all_{table} AS " + " UNION ALL ".join(selects[table]))
+        yield conn
+    finally:
+        conn.close()
+
+# ------------- bulk export / import -------------
+# Rows stream through cursor.fetchmany()/file readers in EXPORT_CHUNK_ROWS
+# chunks, so memory stays flat however big the tables are. Parquet needs
+# pyarrow; JSONL and CSV use the standard library. CSV writes NULL as ''.
+EXPORT_TABLES = ("users", "sessions", "ai_logs", "distraction_events")
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+EXPORT_CHUNK_ROWS = 10_000
+IMPORT_COMMIT_ROWS = 100_000    # rows per import transaction
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export/import needs pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+def _arrow_schema(pa, conn, table, cols):
+    types = {r[1]: (r[2] or "").upper() for r in conn.execute(f"PRAGMA main.table_info({table})")}
+    def arrow_type(decl):
+        if "INT" in decl:
+            return pa.int64()
+        if "REAL" in decl or "FLOA" in decl or "DOUB" in decl:
+            return pa.float64()
+        return pa.string()
+    return pa.schema([(c, arrow_type(types.get(c, ""))) for c in cols])
+
+def _write_chunks(fmt, out_file, cols, chunks, arrow_schema=None):
+    count = 0
+    if fmt == "jsonl":
+        with open(out_file, "w", encoding="utf-8") as f:
+            for rows in chunks:
+                f.writelines(json.dumps(dict(zip(cols, row)), ensure_ascii=False) + "\n" for row in rows)
+                count += len(rows)
+    elif fmt == "csv":
+        with open(out_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(cols)
+            for rows in chunks:
+                writer.writerows(rows)
+                count += len(rows)
+    else:
+        pa, pq = _require_pyarrow()
+        with pq.ParquetWriter(out_file, arrow_schema) as writer:
+            for rows in chunks:
+                columns = list(zip(*rows))
+                writer.write_batch(pa.record_batch([list(c) for c in columns], schema=arrow_schema))
+                count += len(rows)
+    return count
+
+def _read_chunks(fmt, in_file, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield (columns, rows) chunks from an export file."""
+    if fmt == "jsonl":
+        with open(in_file, encoding="utf-8") as f:
+            cols = None; rows = []
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if cols is None:
+                    cols = list(record)
+                rows.append(tuple(record.get(c) for c in cols))
+                if len(rows) >= chunk_rows:
+                    yield cols, rows; rows = []
+            if rows:
+                yield cols, rows
+    elif fmt == "csv":
+        with open(in_file, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            cols = next(reader, None)
+            rows = []
+            for record in reader:
+                rows.append(tuple(v if v != "" else None for v in record))
+                if len(rows) >= chunk_rows:
+                    yield cols, rows; rows = []
+            if rows:
+                yield cols, rows
+    else:
+        _, pq = _require_pyarrow()
+        parquet = pq.ParquetFile(in_file)
+        for batch in parquet.iter_batches(batch_size=chunk_rows):
+            cols = batch.schema.names
+            yield cols, list(zip(*(column.to_pylist() for column in batch.columns)))
+
+def export_data(out_dir, fmt="jsonl", tables=EXPORT_TABLES, include_archive=False, path=None):
+    """
+    Stream each table to out_dir/<table>.<fmt>. With include_archive, archived
+    sessions/ai_logs/distraction_events are exported too (via history()).
+    Returns {table: rows written}.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    if fmt == "parquet":
+        _require_pyarrow()
+    flush_writes()
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    with (history(path) if include_archive else connection(path)) as conn:
+        for table in tables:
+            source = f"all_{table}" if include_archive and table in ARCHIVED_TABLES else table
+            cols = _table_columns(conn, table)
+            cursor = conn.execute(f"SELECT {', '.join(cols)} FROM {source} ORDER BY id")
+            chunks = iter(lambda: cursor.fetchmany(EXPORT_CHUNK_ROWS), [])
+            schema = _arrow_schema(_require_pyarrow()[0], conn, table, cols) if fmt == "parquet" else None
+            counts[table] = _write_chunks(fmt, os.path.join(out_dir, f"{table}.{fmt}"), cols, chunks, schema)
+    return counts
+
+def import_data(in_dir, fmt="jsonl", tables=EXPORT_TABLES, path=None):
+    """
+    Load out_dir/<table>.<fmt> files written by export_data into the hot DB.
+    Rows are upserted by id with executemany, IMPORT_COMMIT_ROWS per
+    transaction. Returns {table: rows read}.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    if fmt == "parquet":
+        _require_pyarrow()
+    init_db(path)
+    counts = {}
+    for table in tables:
+        in_file = os.path.join(in_dir, f"{table}.{fmt}")
+        if not os.path.exists(in_file):
+            continue
+        with connection(path) as conn:
+            known = set(_table_columns(conn, table))
+        count = 0
+        sql = None
+        chunks = _read_chunks(fmt, in_file)
+        done = False
+        while not done:
+            with transaction(path) as cur:
+                pending = 0
+                for cols, rows in chunks:
+                    keep = [i for i, c in enumerate(cols) if c in known]
+                    names = [cols[i] for i in keep]
+                    if sql is None:
+                        updates = ", ".join(f"{c} = excluded.{c}" for c in names if c != "id")
+                        sql = (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+                               f" ON CONFLICT(id) DO UPDATE SET {updates}")
+                    cur.executemany(sql, [tuple(row[i] for i in keep) for row in rows])
+                    count += len(rows); pending += len(rows)
+                    if pending >= IMPORT_COMMIT_ROWS:
+                        break
+                else:
+                    done = True
+        counts[table] = count
+    bump_changes()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m database", description="MindAnchor database tools")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("init", help="create/upgrade the schema (default)")
+    p_archive = sub.add_parser("archive", help="move old sessions into per-month archive files")
+    p_archive.add_argument("--days", type=int, default=ARCHIVE_HORIZON_DAYS, help="keep this many days in the hot DB")
+    p_export = sub.add_parser("export", help="stream tables to JSONL/CSV/Parquet files")
+    p_export.add_argument("out_dir")
+    p_export.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    p_export.add_argument("--tables", nargs="+", choices=EXPORT_TABLES, default=list(EXPORT_TABLES))
+    p_export.add_argument("--with-archive", action="store_true", help="include archived months")
+    p_import = sub.add_parser("import", help="load files written by 'export'")
+    p_import.add_argument("in_dir")
+    p_import.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    p_import.add_argument("--tables", nargs="+", choices=EXPORT_TABLES, default=list(EXPORT_TABLES))
+    args = parser.parse_args(argv)
 
-if __name__ == "__main__":
     init_db()
-    print("✅ MindAnchor AI database initialized.")
\ No newline at end of file
+    if args.command == "archive":
+        moved = archive_old_sessions(args.days)
+        for month, count in moved.items():
+            print(f"📦 {month}: archived {count} sessions")
+        if not moved:
+            print("Nothing older than the horizon to archive.")
+    elif args.command == "export":
+        counts = export_data(args.out_dir, args.format, args.tables, args.with_archive)
+        for table, count in counts.items():
+            print(f"⬆️  {table}: {count} rows -> {os.path.join(args.out_dir, table + '.' + args.format)}")
+    elif args.command == "import":
+        counts = import_data(args.in_dir, args.format, args.tables)
+        for table, count in counts.items():
+            print(f"⬇️  {table}: {count} rows imported")
+    else:
+        print("✅ MindAnchor AI database initialized.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# face_detector.py
+# Face detection backends behind one interface, with process-wide cached instances.
+# Backends: "haar" (OpenCV default), "lbp" (faster cascade), "dnn" (OpenCV res10 SSD).
+
+import os
+import threading
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except Exception:
+    CV2_AVAILABLE = False
+
+DEFAULT_BACKEND = "haar"
+MODELS_DIR = "models"
+
+# Same parameters the camera loop always used
+SCALE_FACTOR = 1.1
+MIN_NEIGHBORS = 4
+MIN_FACE_SIZE = (60, 60)
+
+HAAR_CASCADE = "haarcascade_frontalface_default.xml"
+LBP_CASCADE = "lbpcascade_frontalface_improved.xml"
+# OpenCV's face SSD: https://github.com/opencv/opencv/tree/4.x/samples/dnn/face_detector
+DNN_PROTOTXT = "deploy.prototxt"
+DNN_WEIGHTS = "res10_300x300_ssd_iter_140000.caffemodel"
+DNN_INPUT_SIZE = (300, 300)
+DNN_MEAN = (104.0, 177.0, 123.0)
+DNN_CONFIDENCE = 0.5
+
+
+class FaceDetector:
+    """
+    Common interface: detect(frame, gray=None) -> list of (x, y, w, h) boxes.
+    `frame` is a BGR image; pass `gray` if the caller already converted it.
+    Instances are shared across threads, so detect() is serialized per instance.
+    """
+    name = "base"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def detect(self, frame, gray=None):
+        with self._lock:
+            return self._detect(frame, gray)
+
+    def _detect(self, frame, gray):
+        raise NotImplementedError
+
+
+class CascadeDetector(FaceDetector):
+    def __init__(self, cascade_path):
+        super().__init__()
+        self.classifier = cv2.CascadeClassifier(cascade_path)
+        if self.classifier.empty():
+            raise RuntimeError(f"could not load cascade {cascade_path}")
+
+    def _detect(self, frame, gray):
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.classifier.detectMultiScale(gray, scaleFactor=SCALE_FACTOR,
+                                                 minNeighbors=MIN_NEIGHBORS, minSize=MIN_FACE_SIZE)
+        return [tuple(int(v) for v in f) for f in faces]
+
+
+class HaarDetector(CascadeDetector):
+    name = "haar"
+
+    def __init__(self):
+        super().__init__(cv2.data.haarcascades + HAAR_CASCADE)
+
+
+class LBPDetector(CascadeDetector):
+    name = "lbp"
+
+    def __init__(self):
+        # opencv-python wheels only ship Haar cascades; look in models/ first
+        candidates = [os.path.join(MODELS_DIR, LBP_CASCADE),
+                      os.path.join(os.path.dirname(os.path.dirname(cv2.data.haarcascades)), "lbpcascades", LBP_CASCADE)]
+        path = next((p for p in candidates if os.path.exists(p)), candidates[0])
+        super().__init__(path)
+
+
+class DnnDetector(FaceDetector):
+    name = "dnn"
+
+    def __init__(self, prototxt=None, weights=None, confidence=DNN_CONFIDENCE):
+        super().__init__()
+        prototxt = prototxt or os.path.join(MODELS_DIR, DNN_PROTOTXT)
+        weights = weights or os.path.join(MODELS_DIR, DNN_WEIGHTS)
+        if not (os.path.exists(prototxt) and os.path.exists(weights)):
+            raise RuntimeError(f"DNN face model not found (expected {prototxt} and {weights})")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt, weights)
+        self.confidence = confidence
+
+    def _detect(self, frame, gray):
+        h, w = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, DNN_INPUT_SIZE), 1.0, DNN_INPUT_SIZE, DNN_MEAN)
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        faces = []
+        for det in detections[detections[:, 2] >= self.confidence]:
+            x1, y1 = max(0, int(det[3] * w)), max(0, int(det[4] * h))
+            x2, y2 = min(w, int(det[5] * w)), min(h, int(det[6] * h))
+            if x2 - x1 >= MIN_FACE_SIZE[0] and y2 - y1 >= MIN_FACE_SIZE[1]:
+                faces.append((x1, y1, x2 - x1, y2 - y1))
+        return faces
+
+
+BACKENDS = {
+    "haar": HaarDetector,
+    "lbp": LBPDetector,
+    "dnn": DnnDetector,
+}
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+def get_detector(backend=None):
+    """
+    Return the shared detector for `backend` (default DEFAULT_BACKEND),
+    loading it once per process. Falls back to Haar if the backend's model
+    files are missing. Returns None when OpenCV is not installed.
+    """
+    if not CV2_AVAILABLE:
+        return None
+    backend = backend or DEFAULT_BACKEND
+    with _detectors_lock:
+        detector = _detectors.get(backend)
+        if detector is None:
+            try:
+                detector = BACKENDS[backend]()
+            except (KeyError, RuntimeError, cv2.error) as e:
+                if backend == "haar":
+                    raise
+                print(f"Face detector '{backend}' unavailable ({e}); falling back to haar.")
+                detector = _detectors.get("haar") or HaarDetector()
+                _detectors["haar"] = detector
+            _detectors[backend] = detector
+        return detector
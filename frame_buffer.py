@@ -0,0 +1,114 @@
+# frame_buffer.py
+# Preallocated ring of camera frames shared between the camera thread (single
+# writer) and the preview / verify / detector readers, without per-frame copies.
+
+import threading
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False   # rings are only allocated once a camera frame arrives
+
+FRAME_SLOTS = 4                 # ring size; a reader's view stays intact for FRAME_SLOTS-2 further writes
+
+
+class FrameRing:
+    """
+    Single-writer, multi-reader frame ring with sequence numbers.
+
+    Writer:   buf = ring.next_buffer(); ret, frame = cap.read(buf); ring.commit(frame)
+              (cap.read fills `buf` in place; commit() only copies if the
+              capture handed back a different array, e.g. after a size change)
+    Readers:  seq, view = ring.latest(after=last_seq)
+              `view` is a read-only view of the newest frame, or None when
+              nothing newer than `after` was committed. Views are not copies:
+              use them promptly, or check still_valid(seq) afterwards.
+    Shared:   pass `buffers` (e.g. views over multiprocessing shared memory)
+              to use fixed external slots; a ring in another process that
+              only reads calls publish(seq) when the writer reports a frame.
+    """
+
+    def __init__(self, slots=FRAME_SLOTS, buffers=None):
+        self.slots = slots
+        self._buffers = list(buffers) if buffers is not None else None
+        self._shared = buffers is not None
+        self._seq = 0               # sequence number of the newest committed frame (0 = none)
+        self._lock = threading.Lock()
+        self.allocations = 0        # buffer (re)allocations, for benchmarks
+        self.copies = 0             # commits that had to copy into the ring
+
+    def _allocate(self, shape, dtype):
+        self._buffers = [np.empty(shape, dtype) for _ in range(self.slots)]
+        self.allocations += self.slots
+
+    def next_buffer(self):
+        """Buffer the writer should fill next (None before the first commit)."""
+        if self._buffers is None:
+            return None
+        return self._buffers[(self._seq + 1) % self.slots]
+
+    def commit(self, frame):
+        """Publish `frame` as the newest frame and return its sequence number."""
+        if self._buffers is None or self._buffers[0].shape != frame.shape or self._buffers[0].dtype != frame.dtype:
+            if self._shared:
+                raise ValueError(f"frame {frame.shape} does not fit shared slots {self._buffers[0].shape}")
+            self._allocate(frame.shape, frame.dtype)
+        seq = self._seq + 1
+        slot = self._buffers[seq % self.slots]
+        if frame is not slot:
+            np.copyto(slot, frame)
+            self.copies += 1
+        with self._lock:
+            self._seq = seq
+        return seq
+
+    def publish(self, seq):
+        """Reader side of a shared ring: frame `seq` is now in slot seq % slots."""
+        with self._lock:
+            if seq > self._seq:
+                self._seq = seq
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def latest(self, after=0):
+        """Return (seq, read-only view) of the newest frame, view None if not newer than `after`."""
+        with self._lock:
+            seq = self._seq
+            if seq == 0 or seq <= after:
+                return seq, None
+            view = self._buffers[seq % self.slots].view()
+        view.flags.writeable = False
+        return seq, view
+
+    def still_valid(self, seq):
+        """True while the slot holding frame `seq` has not been handed to the writer again."""
+        return self._seq - seq < self.slots - 1
+
+    def clear(self):
+        """Forget published frames (buffers are kept for reuse)."""
+        with self._lock:
+            self._seq = 0
+
+    def release(self):
+        """Drop the buffers (required before closing shared memory they point into)."""
+        with self._lock:
+            self._seq = 0
+            self._buffers = None
+
+
+def reader(cap, ring):
+    """
+    read() for presence.PresenceMonitor: decodes the next frame from `cap`
+    straight into `ring` and returns it, or None when the read failed.
+    """
+    def read():
+        buf = ring.next_buffer()
+        ret, frame = cap.read(buf) if buf is not None else cap.read()
+        if not ret:
+            return None
+        ring.commit(frame)
+        return frame
+    return read
@@ -0,0 +1,129 @@
+# governor.py
+# Adaptive polling rates for a focus session.
+# Replaces the fixed FACE_POLL_INTERVAL / ACTIVE_WINDOW_POLL / FREEZE_COOLDOWN
+# with values derived from presence stability, keyboard/mouse activity and
+# this process's CPU load, kept inside configured bounds and an absence SLO.
+
+import time
+
+# (min, max) seconds for each rate
+BOUNDS = {
+    "face_poll": (0.2, 1.0),
+    "window_poll": (2.0, 15.0),
+    "cooldown": (3.0, 10.0),
+}
+ABSENCE_SLO = 5.0               # secs from leaving the desk to the no_face event, worst case
+STABLE_RAMP = 60.0              # secs of steady presence to ramp face polling from min to max
+UNSTABLE_WINDOW = 10.0          # presence changed this recently -> poll at the minimum
+INPUT_RECENT = 10.0             # keyboard/mouse within this many secs counts as "active"
+FREEZE_WINDOW = 300.0           # freezes counted over this many secs
+REPEATED_FREEZES = 3            # this many freezes in FREEZE_WINDOW -> longest cooldown
+CPU_BUDGET = 0.5                # process CPU (fraction of one core) above which polling backs off
+CPU_SAMPLE = 1.0                # secs between CPU load samples
+
+
+class PollingGovernor:
+    """
+    Session-scoped rate controller. Feed it observations (observe_face,
+    observe_input, observe_freeze) from any thread and read the rates
+    (face_poll_interval, window_poll_interval, cooldown) where the loops
+    sleep. The face interval never exceeds absence_slo - missing_threshold,
+    so a user who leaves is flagged within the SLO at any rate.
+    snapshot() returns the current rates with the reason for each.
+    """
+
+    def __init__(self, missing_threshold=4, cooldown=6, absence_slo=ABSENCE_SLO, bounds=None,
+                 cpu_budget=CPU_BUDGET, clock=None):
+        self.bounds = dict(BOUNDS, **(bounds or {}))
+        self.missing_threshold = missing_threshold
+        self.base_cooldown = cooldown
+        self.absence_slo = absence_slo
+        self.cpu_budget = cpu_budget
+        self.now = clock.now if clock is not None else time.time
+        start = self.now()
+        self.present = None
+        self.last_change = start
+        self.last_input = None
+        self.freezes = []
+        self.cpu_load = 0.0
+        self._cpu_mark = (time.perf_counter(), time.process_time())
+        self.reasons = {}
+
+    # ---------- observations ----------
+    def observe_face(self, present):
+        if present != self.present:
+            self.present = present
+            self.last_change = self.now()
+
+    def observe_input(self):
+        self.last_input = self.now()
+
+    def observe_freeze(self):
+        now = self.now()
+        self.freezes = [t for t in self.freezes if now - t < FREEZE_WINDOW] + [now]
+
+    def _sample_cpu(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        if wall - self._cpu_mark[0] >= CPU_SAMPLE:
+            self.cpu_load = (cpu - self._cpu_mark[1]) / (wall - self._cpu_mark[0])
+            self._cpu_mark = (wall, cpu)
+        return self.cpu_load
+
+    def _input_active(self, now):
+        return self.last_input is not None and now - self.last_input < INPUT_RECENT
+
+    # ---------- rates ----------
+    def face_poll_interval(self):
+        now = self.now()
+        lo, hi = self.bounds["face_poll"]
+        hi = max(lo, min(hi, self.absence_slo - self.missing_threshold))
+        steady = now - self.last_change
+        if not self.present:
+            interval, reason = lo, "face not seen: timing the absence"
+        elif steady < UNSTABLE_WINDOW:
+            interval, reason = lo, f"presence changed {steady:.0f}s ago"
+        elif self._input_active(now):
+            interval, reason = hi, "present and typing/moving the mouse"
+        else:
+            interval = lo + (hi - lo) * min(1.0, steady / STABLE_RAMP)
+            reason = f"present and steady for {steady:.0f}s"
+        if self._sample_cpu() > self.cpu_budget and interval < hi:
+            interval, reason = hi, f"CPU {self.cpu_load:.0%} over budget {self.cpu_budget:.0%}"
+        self.reasons["face_poll"] = reason
+        return interval
+
+    def window_poll_interval(self):
+        now = self.now()
+        lo, hi = self.bounds["window_poll"]
+        if self._input_active(now):
+            interval, reason = lo, "keyboard/mouse active: app switches likely"
+        else:
+            idle = now - self.last_input if self.last_input is not None else None
+            interval = hi
+            reason = f"no input for {idle:.0f}s" if idle is not None else "no input yet"
+        if self._sample_cpu() > self.cpu_budget:
+            interval = max(interval, (lo + hi) / 2)
+            reason += f"; CPU {self.cpu_load:.0%} over budget"
+        self.reasons["window_poll"] = reason
+        return interval
+
+    def cooldown(self):
+        now = self.now()
+        lo, hi = self.bounds["cooldown"]
+        recent = sum(1 for t in self.freezes if now - t < FREEZE_WINDOW)
+        if recent >= REPEATED_FREEZES:
+            value, reason = hi, f"{recent} freezes in {FREEZE_WINDOW / 60:.0f} min"
+        elif self._input_active(now):
+            value, reason = hi, "input active: a missing face is likely a detection miss"
+        else:
+            value, reason = min(hi, max(lo, self.base_cooldown)), "default"
+        self.reasons["cooldown"] = reason
+        return value
+
+    def snapshot(self):
+        """Current rates, inputs and the reason behind each rate."""
+        rates = {"face_poll": self.face_poll_interval(),
+                 "window_poll": self.window_poll_interval(),
+                 "cooldown": self.cooldown()}
+        return {"rates": rates, "cpu_load": self.cpu_load, "present": self.present,
+                "reasons": dict(self.reasons)}
@@ -4,7 +4,7 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import threading, time, os, random, sqlite3
+import threading, time, os, random
 from datetime import datetime
 
 # Pillow for preview conversion
@@ -35,6 +35,14 @@ except Exception:
 
 # local DB helper
 import database
+import capture
+import face_detector
+import governor
+import frame_buffer
+import presence
+import preview
+import vision_worker
+from subjects import SUBJECT_SUGGESTIONS
 
 # --- NEW: Import the ChatbotManager ---
 from chatbot_manager import ChatbotManager
@@ -49,6 +57,13 @@ FACE_MISSING_THRESHOLD = 4      # secs of continuous absence before flagging
 INITIAL_FACE_TIMEOUT = 6        # secs to try find face at session start
 FREEZE_COOLDOWN = 6             # cooldown after freeze
 PREVIEW_SIZE = (320, 240)       # small preview window size
+FACE_DETECTOR_BACKEND = "haar"  # "haar", "lbp" or "dnn" (see face_detector.py; models go in models/)
+MOTION_GATE = True              # skip detection on static frames (bounded staleness, see presence.py)
+VISION_PROCESS = False          # run capture + detection in a separate process (see vision_worker.py)
+ADAPTIVE_POLLING = True         # tune the three rates above from presence/input/CPU (see governor.py)
+ABSENCE_SLO = 5                 # secs: with adaptive polling, leaving is still flagged within this
+CHAT_FLUSH_MS = 33              # streamed chat tokens are drawn at most once per this many ms
+WRITE_FLUSH_TIMEOUT = 2         # secs the Tk thread waits for queued DB writes at session end
 
 # ------------- NEW: COLOR & FONT PALETTE -------------
 COLORS = {
@@ -77,10 +92,6 @@ FONTS = {
 
 
 # ------------- static lists -------------
-SUBJECT_SUGGESTIONS = ["Mathematics","Physics","Chemistry","Data Structures","C Programming",
-                       "C++","Python","AI/ML","Web Development","Databases","Operating Systems",
-                       "Electronics","Robotics","Assignments","Revision","Reading","Practice Problems"]
-
 ENCOURAGEMENTS = ["Nice! Keep the focus 🔥","You're doing great — stay steady 💪",
                   "Small wins add up — keep going!","Breathe. One minute at a time.",
                   "Discipline beats motivation — you're building it!","Eyes on the goal — you got this!",
@@ -107,10 +118,15 @@ class AppState:
         # camera shared state
         self._cam = None
         self._cam_thread = None
-        self._latest_frame = None      # BGR numpy array
+        self.camera = capture.CameraService()  # warm webcam shared by consecutive sessions
+        self._monitor = None           # presence.PresenceMonitor of the camera thread
+        self._vision = None            # vision_worker.VisionWorker when VISION_PROCESS is on
+        self._governor = None          # governor.PollingGovernor of the running session (rates + reasons)
+        self._frames = frame_buffer.FrameRing()   # latest BGR frames, shared without copies
         self._last_face_time = 0
         self._preview_win = None
         self._preview_label = None
+        self._preview = None           # preview.PreviewRenderer (stats: drawn/unchanged/paused, draw_ms)
         
         # --- NEW: Add chat_manager to app state ---
         self.chat_manager = None
@@ -313,6 +329,7 @@ def show_user_details_frame(root, container, style):
         uid = database.save_user(name, country, age, gender, interest)
         if uid:
             app_state.current_user_id = uid
+            if app_state.chat_manager: app_state.chat_manager.user_id = uid
             messagebox.showinfo("Saved", f"Welcome, {name.split()[0]}! Your profile is saved.")
             show_session_planner(root, container, app_state.style)
         else:
@@ -322,8 +339,14 @@ def show_user_details_frame(root, container, style):
     frame.grid_columnconfigure(0, weight=1); frame.grid_columnconfigure(1, weight=2)
 
 # ---------- session planner (NEW CARD LAYOUT) ----------
+def warm_up_camera():
+    # open the webcam in the background while the user plans the session
+    if CV2_AVAILABLE and not VISION_PROCESS:
+        app_state.camera.warm_up()
+
 def show_session_planner(root, container, style):
     frame = show_centered_card(container) # Use the new card layout
+    warm_up_camera()
 
     ttk.Label(frame, text="Create your session", style="H1.TLabel").grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 25))
 
@@ -409,6 +432,10 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
                                 background=COLORS["BG_MAIN"])
     encourage_label.pack(pady=(15, 6))
 
+    camera_var = tk.StringVar(value="")
+    ttk.Label(content_frame, textvariable=camera_var, font=FONTS["BODY"],
+              foreground=COLORS["TEXT_LIGHT"], background=COLORS["BG_MAIN"]).pack()
+
     controls = ttk.Frame(content_frame, style="TFrame")
     controls.pack(pady=(10, 20))
 
@@ -418,9 +445,7 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
         encourage_var.set(f"Logged distraction. Stay honest — distractions: {distractions['count']}")
         if app_state._session_row_id:
             try:
-                conn = sqlite3.connect(database.DB_PATH); cur = conn.cursor()
-                cur.execute("UPDATE sessions SET distractions = ? WHERE id = ?", (distractions["count"], app_state._session_row_id))
-                conn.commit(); conn.close()
+                database.enqueue_distraction_event(app_state._session_row_id, "manual")
             except Exception as e:
                 print("DB update error:", e)
     
@@ -438,9 +463,7 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
             distractions["count"] = ans
             if app_state._session_row_id:
                 try:
-                    conn = sqlite3.connect(database.DB_PATH); cur = conn.cursor()
-                    cur.execute("UPDATE sessions SET distractions = ? WHERE id = ?", (distractions["count"], app_state._session_row_id))
-                    conn.commit(); conn.close()
+                    database.enqueue_session_distractions(app_state._session_row_id, distractions["count"])
                 except Exception as e:
                     print("DB update error:", e)
         finish_session()
@@ -486,23 +509,74 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
         chat_display.config(state="disabled")
         chat_display.see("end") # Auto-scroll
 
-    def get_response_threaded(prompt):
+    # Replies stream in: the worker thread only appends tokens to `pending`; a
+    # Tk-side flush, once per CHAT_FLUSH_MS frame, inserts whatever has arrived.
+    chat_stream = {"state": None}
+
+    def stream_response_threaded(prompt, state):
         """Runs the AI in a thread to prevent GUI freezing"""
         try:
-            response = app_state.chat_manager.get_response(prompt)
-            app_state.root.after(0, lambda: add_to_chat("Bot", response))
+            for text in app_state.chat_manager.stream_response(prompt, cancel=state["cancel"]):
+                with state["lock"]:
+                    state["pending"].append(text)
         except Exception as e:
-            app_state.root.after(0, lambda: add_to_chat("Error", f"Could not get response: {e}"))
+            with state["lock"]:
+                state["pending"].append(f"[Could not get response: {e}]")
+        finally:
+            with state["lock"]:
+                state["done"] = True
+
+    def flush_chat(state):
+        # drain and read `done` together: a token appended after the drain
+        # can't be lost behind a `done` seen afterwards
+        with state["lock"]:
+            text = "".join(state["pending"]); state["pending"].clear()
+            done = state["done"]
+        if state["finished"] or not chat_display.winfo_exists():
+            return
+        cancelled = state["cancel"].is_set()
+        finished = done or cancelled
+        if cancelled and not done:
+            text += " [stopped]"
+        if finished:
+            text += "\n"
+        if text:
+            chat_display.config(state="normal")
+            chat_display.insert("end", text)
+            chat_display.config(state="disabled")
+            chat_display.see("end")
+        if finished:
+            state["finished"] = True
+            chat_stream["state"] = None
+            chat_button.config(text="Ask")
+        else:
+            app_state.root.after(CHAT_FLUSH_MS, lambda: flush_chat(state))
+
+    def cancel_chat_stream():
+        state = chat_stream["state"]
+        if state is not None:
+            state["cancel"].set()
+            flush_chat(state)   # close the line now so the next message starts on its own
 
     def send_chat_message():
         prompt = chat_var.get().strip()
-        if not prompt: return
+        if not prompt:
+            cancel_chat_stream()   # "Stop" with an empty box
+            return
+        cancel_chat_stream()
         
         add_to_chat("You", prompt)
         chat_var.set("") # Clear the entry box
         
-        add_to_chat("Bot", "...") # Show "thinking..."
-        threading.Thread(target=get_response_threaded, args=(prompt,), daemon=True).start()
+        chat_display.config(state="normal")
+        chat_display.insert("end", "Bot: ")
+        chat_display.config(state="disabled")
+        state = {"cancel": threading.Event(), "lock": threading.Lock(), "pending": [],
+                 "done": False, "finished": False}
+        chat_stream["state"] = state
+        chat_button.config(text="Stop")
+        threading.Thread(target=stream_response_threaded, args=(prompt, state), daemon=True).start()
+        app_state.root.after(CHAT_FLUSH_MS, lambda: flush_chat(state))
 
     chat_button = ttk.Button(chat_input_frame, text="Ask", 
                              style="Accent.TButton", 
@@ -510,7 +584,24 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
     chat_button.pack(side="right")
     
     chat_entry.bind("<Return>", lambda event: send_chat_message())
-    add_to_chat("Bot", f"Hi! I'm Anchor. Ask me for a tip or about your stats!")
+
+    def on_chat_ready(ready):
+        if not chat_display.winfo_exists():
+            return   # session screen already gone
+        if ready.exception() is not None:
+            add_to_chat("Bot", f"Chat is unavailable: {ready.exception()}")
+            return
+        chat_entry.config(state="normal"); chat_button.config(state="normal")
+        add_to_chat("Bot", f"Hi! I'm Anchor. Ask me for a tip or about your stats!")
+
+    ready = app_state.chat_manager.ready
+    if ready.done():
+        on_chat_ready(ready)
+    else:
+        add_to_chat("Bot", "Anchor is warming up...")
+        chat_entry.config(state="disabled"); chat_button.config(state="disabled")
+        # the future resolves on the init thread; hop to Tk before touching widgets
+        ready.add_done_callback(lambda f: app_state.root.after(0, lambda: on_chat_ready(f)))
     
     # --- END NEW CHAT UI ---
 
@@ -538,10 +629,8 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
 
     # create DB session row at start
     try:
-        conn = sqlite3.connect(database.DB_PATH); cur = conn.cursor()
-        cur.execute("INSERT INTO sessions (user_id, session_name, duration_sec, distractions, completed, start_time) VALUES (?, ?, ?, ?, ?, ?)",
-                    (app_state.current_user_id, session_name, total_seconds, 0, 0, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-        conn.commit(); app_state._session_row_id = cur.lastrowid; conn.close()
+        app_state._session_row_id = database.start_session(app_state.current_user_id, session_name, total_seconds,
+                                                           datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     except Exception as e:
         print("Could not create session row:", e); app_state._session_row_id = None
 
@@ -551,12 +640,23 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
     app_state._last_activity = time.time()
     app_state._freeze_shown = False
     app_state._last_freeze_time = 0
-    app_state._latest_frame = None
+    app_state._frames.clear()
     app_state._last_face_time = time.time()
+    app_state._governor = (governor.PollingGovernor(FACE_MISSING_THRESHOLD, FREEZE_COOLDOWN, ABSENCE_SLO)
+                           if ADAPTIVE_POLLING else None)
+
+    def window_poll():
+        return app_state._governor.window_poll_interval() if app_state._governor else ACTIVE_WINDOW_POLL
+
+    def freeze_cooldown():
+        return app_state._governor.cooldown() if app_state._governor else FREEZE_COOLDOWN
 
     # input listeners
     keyboard_listener = None; mouse_listener = None
-    def on_any_activity(*args, **kwargs): app_state._last_activity = time.time()
+    def on_any_activity(*args, **kwargs):
+        app_state._last_activity = time.time()
+        if app_state._governor: app_state._governor.observe_input()
+        if app_state._vision: app_state._vision.input_seen()
 
     def start_input_listeners():
         nonlocal keyboard_listener, mouse_listener
@@ -586,82 +686,75 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
                 win_title = aw.title.lower() if aw and aw.title else ""
                 if allowed_apps and win_title:
                     if not any(keyword in win_title for keyword in allowed_apps):
-                        app_state.root.after(0, lambda: handle_distraction("switched_app"))
+                        app_state.root.after(0, lambda t=win_title: handle_distraction("switched_app", {"window": t}))
                         time.sleep(5)
-                time.sleep(ACTIVE_WINDOW_POLL)
+                time.sleep(window_poll())
             except Exception as e:
-                print("active_window_monitor error:", e); time.sleep(ACTIVE_WINDOW_POLL)
+                print("active_window_monitor error:", e); time.sleep(window_poll())
 
     # CAMERA THREAD + FACE DETECTION (single camera instance)
     def camera_thread_func():
         # only run if cv2 available
         if not CV2_AVAILABLE:
             return
-        try:
-            cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # try directshow on Windows
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            cap.set(cv2.CAP_PROP_FPS, 30)
-        except Exception:
-            try:
-                cap = cv2.VideoCapture(0)
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                cap.set(cv2.CAP_PROP_FPS, 30)
-            except Exception:
-                cap = None
-        if not cap or not cap.isOpened():
+        # this session's stop_event is its owner token with the camera service
+        cap = app_state.camera.acquire(stop_event)  # opened in the background, usually already warm
+        if cap is None:
             print("Camera not available or cannot be opened.")
             return
-        app_state._cam = cap
-        cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        face_cascade = cv2.CascadeClassifier(cascade_path)
-        # initial face detection window
-        initial_deadline = time.time() + INITIAL_FACE_TIMEOUT
-        found_initial = False
-        while not stop_event.is_set() and time.time() < initial_deadline:
-            ret, frame = cap.read()
-            if not ret:
-                time.sleep(0.2); continue
-            app_state._latest_frame = frame.copy()
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(60,60))
-            if len(faces) > 0:
-                found_initial = True
+        try:
+            app_state._cam = cap
+            detector = face_detector.get_detector(FACE_DETECTOR_BACKEND)  # shared, loaded once per process
+            monitor = presence.PresenceMonitor(detector, capture.RealClock(stop_event), FACE_POLL_INTERVAL,
+                                               FACE_MISSING_THRESHOLD, INITIAL_FACE_TIMEOUT, FREEZE_COOLDOWN,
+                                               motion_gate=MOTION_GATE, governor=app_state._governor)
+            app_state._monitor = monitor
+            def on_face():
                 app_state._last_face_time = time.time()
-                break
-            time.sleep(FACE_POLL_INTERVAL)
-        if not found_initial:
-            app_state._last_face_time = time.time()
-        # continuous monitoring
-        while not stop_event.is_set() and remaining["sec"] > 0:
-            ret, frame = cap.read()
-            if not ret:
-                time.sleep(0.2); continue
-            app_state._latest_frame = frame.copy()
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(60,60))
-            if len(faces) > 0:
-                h, w = frame.shape[:2]
-                max_area = 0
-                for (x,y,fw,fh) in faces:
-                    area = fw*fh
-                    if area > max_area: max_area = area
-                if max_area >= (0.01 * w * h):
+                app_state._last_activity = time.time()
+            # frames are decoded straight into the ring; readers get views, nobody copies
+            monitor.run(frame_buffer.reader(cap, app_state._frames), on_face,
+                        on_absent=lambda: app_state.root.after(0, lambda: handle_distraction("no_face")),
+                        should_stop=lambda: stop_event.is_set() or remaining["sec"] <= 0)
+        finally:
+            app_state.camera.release(stop_event)  # stays open for the next session, closes when idle
+            if app_state._stop_event is stop_event:   # a newer session may already own these
+                app_state._cam = None
+                app_state._monitor = None
+
+    # VISION PROCESS: same detection in vision_worker's process, events pumped back here
+    def start_vision_worker():
+        worker = vision_worker.VisionWorker(FACE_DETECTOR_BACKEND, MOTION_GATE, FACE_POLL_INTERVAL,
+                                            FACE_MISSING_THRESHOLD, INITIAL_FACE_TIMEOUT, FREEZE_COOLDOWN,
+                                            adaptive=ADAPTIVE_POLLING, absence_slo=ABSENCE_SLO)
+        try:
+            worker.start()
+        except Exception as e:
+            print("Vision process could not start, using camera thread:", e)
+            return False
+        app_state._vision = worker
+        app_state._frames = worker.frames
+
+        def pump_events():
+            for event in worker.events():
+                if event[0] == "face":
                     app_state._last_face_time = time.time()
                     app_state._last_activity = time.time()
-            else:
-                pass
-            # absence check
-            if time.time() - app_state._last_face_time > FACE_MISSING_THRESHOLD:
-                app_state.root.after(0, lambda: handle_distraction("no_face"))
-                time.sleep(FREEZE_COOLDOWN)
-            time.sleep(FACE_POLL_INTERVAL)
-        try:
-            cap.release()
-        except Exception:
-            pass
-        app_state._cam = None
+                elif event[0] == "no_face" and not stop_event.is_set():
+                    if app_state._governor: app_state._governor.observe_freeze()
+                    app_state.root.after(0, lambda: handle_distraction("no_face"))
+                elif event[0] == "error":
+                    print("Vision process:", event[1])
+        t = threading.Thread(target=pump_events, daemon=True)
+        t.start()
+        app_state._cam_thread = t
+        return True
+
+    def stop_vision_worker():
+        if app_state._vision:
+            app_state._vision.stop()
+            app_state._vision = None
+            app_state._frames = frame_buffer.FrameRing()
 
     # preview updater (Tk label) - uses latest_frame -> PIL -> PhotoImage
     def start_preview_window():
@@ -685,23 +778,19 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
             win.geometry(f'+{event.x_root}+{event.y_root}')
         lbl.bind('<B1-Motion>', move_window)
 
+        renderer = preview.PreviewRenderer(lbl, app_state._frames, PREVIEW_SIZE)
         def update_preview():
-            if app_state._latest_frame is not None:
-                try:
-                    frame = app_state._latest_frame.copy()
-                    frame = frame[:, :, ::-1]  # BGR -> RGB
-                    img = Image.fromarray(frame)
-                    img = img.resize(PREVIEW_SIZE)
-                    photo = ImageTk.PhotoImage(img)
-                    lbl.config(image=photo)
-                    lbl.image = photo
-                except Exception as e:
-                    pass
+            # skips unchanged frames and hidden/minimized windows; one PhotoImage, pasted in place
+            try:
+                renderer.update()
+            except Exception as e:
+                pass
             if win.winfo_exists():
                 win.after(int(FACE_POLL_INTERVAL*1000), update_preview)
             else:
                 app_state._preview_win = None
                 app_state._preview_label = None
+        app_state._preview = renderer
         update_preview()
 
     def stop_preview_window():
@@ -714,8 +803,8 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
             app_state._preview_label = None
 
     # central distraction handler (main thread)
-    def handle_distraction(reason="inactivity"):
-        if app_state._freeze_shown and (time.time() - app_state._last_freeze_time) < FREEZE_COOLDOWN:
+    def handle_distraction(reason="inactivity", payload=None):
+        if app_state._freeze_shown and (time.time() - app_state._last_freeze_time) < freeze_cooldown():
             return
         app_state._freeze_shown = True
         app_state._last_freeze_time = time.time()
@@ -723,9 +812,7 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
         distractions["count"] += 1
         if app_state._session_row_id:
             try:
-                conn = sqlite3.connect(database.DB_PATH); cur = conn.cursor()
-                cur.execute("UPDATE sessions SET distractions = ? WHERE id = ?", (distractions["count"], app_state._session_row_id))
-                conn.commit(); conn.close()
+                database.enqueue_distraction_event(app_state._session_row_id, reason, payload)
             except Exception as e:
                 print("DB update error:", e)
         
@@ -757,15 +844,14 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
         s.map("Popup.TButton", background=[('active', '#E0E0E0')])
 
         def verify_and_close():
-            if CV2_AVAILABLE and app_state._latest_frame is not None:
+            _, frame = app_state._frames.latest()
+            if CV2_AVAILABLE and frame is not None:
                 try:
-                    frame = app_state._latest_frame.copy()
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-                    fc = cv2.CascadeClassifier(cascade_path)
-                    faces = fc.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(60,60))
+                    faces = face_detector.get_detector(FACE_DETECTOR_BACKEND).detect(frame)
                     if len(faces) > 0:
                         freeze.destroy(); app_state._freeze_shown = False; app_state._last_activity = time.time(); app_state._last_face_time = time.time()
+                        for watcher in (app_state._monitor, app_state._vision):
+                            if watcher: watcher.face_seen()
                         return
                     else:
                         messagebox.showwarning("Verification", "Face not detected. Please look at the camera.")
@@ -795,22 +881,25 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
     def stop_all_monitors():
         try:
             stop_event.set()
+            cancel_chat_stream()
             stop_input_listeners()
             stop_preview_window()
-        except Exception:
-            pass
+            stop_vision_worker()
+        except Exception as e:
+            print("stop monitors error:", e)
 
     def finish_session():
         stop_all_monitors()
         elapsed = total_seconds - remaining["sec"]
         completed = completed_flag["val"] and (remaining["sec"] == 0)
-        # finalize DB row
+        # finalize DB row (after any queued distraction writes have landed)
         if app_state._session_row_id:
             try:
-                conn = sqlite3.connect(database.DB_PATH); cur = conn.cursor()
-                cur.execute("UPDATE sessions SET duration_sec = ?, completed = ?, end_time = ? WHERE id = ?",
-                            (elapsed, int(bool(completed)), datetime.now().strftime("%Y-%m-%d %H:%M:%S"), app_state._session_row_id))
-                conn.commit(); conn.close()
+                if not database.flush_writes(timeout=WRITE_FLUSH_TIMEOUT):
+                    # queued events were lost or are stuck behind a locked DB: write the on-screen count now
+                    database.update_session_distractions(app_state._session_row_id, distractions["count"])
+                database.finalize_session(app_state._session_row_id, elapsed, completed,
+                                          datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
             except Exception as e:
                 print("DB finalize error:", e)
         show_session_result(root, container, session_name, elapsed, distractions["count"], completed, style)
@@ -826,15 +915,29 @@ def start_focus_session(root, container, session_name, minutes, style, allowed_a
 
     # ... (start_input_listeners and stop_input_listeners are defined above) ...
 
-    # start camera thread + preview if available
-    if CV2_AVAILABLE:
-        t = threading.Thread(target=camera_thread_func, daemon=True)
-        t.start()
-        app_state._cam_thread = t
-        time.sleep(0.4) # small delay
-        if PIL_AVAILABLE:
+    def on_camera_ready(ok):
+        # Tk thread; the session may already be over by the time the camera opened
+        if stop_event.is_set():
+            return
+        camera_var.set("" if ok else "📷 Camera unavailable — presence checks are off")
+        if ok and PIL_AVAILABLE:
             start_preview_window()
 
+    # start camera thread + preview if available (never blocks the Tk thread)
+    if CV2_AVAILABLE:
+        if VISION_PROCESS:
+            app_state.camera.close()  # the worker process needs the device
+        if VISION_PROCESS and start_vision_worker():
+            on_camera_ready(True)
+        else:
+            if app_state.camera.state != "ready":
+                camera_var.set("📷 Starting camera…")
+            app_state.camera.warm_up()
+            app_state.camera.when_ready(lambda ok: app_state.root.after(0, on_camera_ready, ok))
+            t = threading.Thread(target=camera_thread_func, daemon=True)
+            t.start()
+            app_state._cam_thread = t
+
     # start other monitors
     start_input_listeners()
     if PGW_AVAILABLE and allowed_apps:
@@ -881,6 +984,7 @@ def show_session_result(root, container, session_name, elapsed_sec, distractions
 
 def show_session_planner_next(root, container, style):
     frame = show_centered_card(container) # Use card layout
+    warm_up_camera()
     
     prev = app_state.current_session_results[-1] if app_state.current_session_results else {}
     suggested = prev.get("session_name", "") if prev else ""
@@ -927,6 +1031,15 @@ def show_final_report(root, container, style):
     ttk.Label(frame, 
               text=f"Total Focus Time: {total_focus//60} min | Avg Distractions: {avg_distractions:.2f} | Completed: {completed_count}/{len(rows)}",
               style="TLabel", font=FONTS["BODY_BOLD"]).pack(pady=(8,12), anchor="w")
+
+    # Today's totals come straight from the daily_stats rollup (a few rows per topic)
+    try:
+        today = database.fetch_daily_stats(app_state.current_user_id)
+        ttk.Label(frame,
+                  text=f"Today: {sum(r[2] for r in today)//60} min over {sum(r[1] for r in today)} sessions | Distractions: {sum(r[3] for r in today)}",
+                  style="TLabel", font=FONTS["BODY"]).pack(pady=(0,12), anchor="w")
+    except Exception as e:
+        print("DB read error:", e)
     
     # --- STYLED CHART ---
     try:
@@ -968,33 +1081,32 @@ def show_final_report(root, container, style):
     except Exception as e:
         ttk.Label(frame, text=f"Could not make chart (matplotlib missing?): {e}").pack(pady=(10,6))
 
-    suggestion_text = generate_suggestions(rows)
+    database.flush_writes(timeout=WRITE_FLUSH_TIMEOUT)   # the session row was written synchronously anyway
+    suggestion_text = generate_suggestions(app_state.current_user_id)
     ttk.Label(frame, text="Suggestions:", font=FONTS["H2"], style="H2.TLabel", background=COLORS["BG_CARD"]).pack(pady=(15, 4), anchor="w")
     ttk.Label(frame, text=suggestion_text, wraplength=700, justify="left", style="TLabel").pack(pady=(0, 15), anchor="w")
     
     ttk.Button(frame, text="Finish & Close App", style="Accent.TButton", 
                command=lambda: on_finish(root)).pack(pady=(15, 6), ipady=4, ipadx=10)
 
-def generate_suggestions(rows):
-    # (Function unchanged)
-    if not rows: return "No sessions found to analyze."
-    durations = [r[2] for r in rows]; distractions = [r[3] for r in rows]; completed = [r[4] for r in rows]
-    avg_dis = sum(distractions)/len(distractions); completed_frac = sum(completed)/len(completed); avg_duration_min = sum(durations)/len(durations)/60.0
-    if completed_frac >= 0.8 and avg_dis <= 1:
-        next_len = avg_duration_min * 1.10
+def generate_suggestions(user_id):
+    # Built on analytics.py: uses the user's full history (vectorized), not just this run's rows
+    try:
+        import analytics
+        report = analytics.user_report(user_id)
+    except Exception as e:
+        print("analytics error:", e); return "Could not analyze your sessions right now."
+    if not report: return "No sessions found to analyze."
+    next_len = report["recommended_minutes"]
+    if report["recommendation"] == "increase":
         next_advice = f"You tend to complete sessions with few distractions — try increasing your next session to about {int(next_len)} minutes."
-    elif avg_dis > 2 or completed_frac < 0.6:
-        next_len = max(5, avg_duration_min * 0.8)
+    elif report["recommendation"] == "shorten":
         next_advice = f"You experienced several distractions — try shorter sessions (~{int(next_len)} minutes) and frequent breaks to build consistency."
     else:
-        next_len = avg_duration_min
         next_advice = f"Keep your current session length (~{int(next_len)} minutes) and focus on improving consistency."
-    topic_stats = {}
-    for r in rows:
-        name = r[1]; topic_stats.setdefault(name, []).append(r[3])
-    avg_topic_dis = {t: (sum(v)/len(v)) for t,v in topic_stats.items()}
-    best_topic = min(avg_topic_dis, key=avg_topic_dis.get) if avg_topic_dis else "your priority topic"
-    plan = (f"{next_advice} For your day: schedule your most important session on '{best_topic}', alternate focus blocks with 5–10 min breaks, and re-evaluate after a week.")
+    best_topic = report["best_topic"] or "your priority topic"
+    when = f" around {report['best_hour']:02d}:00, your least distracted hour" if report["best_hour"] is not None else ""
+    plan = (f"{next_advice} For your day: schedule your most important session on '{best_topic}'{when}, alternate focus blocks with 5–10 min breaks, and re-evaluate after a week.")
     return plan
 
 def on_finish(root):
@@ -1021,14 +1133,15 @@ def start_app():
     app_state.style = style
     
     # --- NEW: Initialize the ChatbotManager ---
-    print("Initializing ChatbotManager... (This may take a sec)")
-    app_state.chat_manager = ChatbotManager(main_db_path=database.DB_PATH)
-    print("ChatbotManager initialized.")
+    # engines load on a background thread; the chat box shows "warming up" until ready
+    app_state.chat_manager = ChatbotManager(main_db_path=database.DB_PATH).start()
     # --- END NEW ---
     
     # Start with the new welcome screen
     show_welcome_frame(root, container, style)
     root.mainloop()
+    app_state.camera.close()
+    database.shutdown() # drain queued writes before exit
 
 if __name__ == "__main__":
     database.init_db(); start_app()
\ No newline at end of file
@@ -0,0 +1,275 @@
+# lab_server.py
+# Headless presence service for shared study labs: one process watches many
+# seats. Each seat runs the camera loop (presence.PresenceMonitor) on its own
+# thread; full face detections from all seats are batched onto a process pool,
+# so N seats share a few cascade instances instead of N Tk apps.
+# Usage: python lab_server.py seats.csv [--minutes 50] [--workers N] [--backend haar]
+#   seats.csv rows: seat,source,user_id,session_name
+#   source: device index ("0"), video file, image directory, stream URL or "synthetic"
+
+import os
+import csv
+import time
+import queue
+import argparse
+import datetime
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future, ProcessPoolExecutor
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except Exception:
+    CV2_AVAILABLE = False
+
+import capture
+import database
+import face_detector
+import frame_buffer
+import presence
+
+BATCH_MAX = 16                  # frames per detection task
+BATCH_WAIT = 0.02               # secs the batcher waits for more frames before submitting
+SESSION_MINUTES = 50            # planned length of each seat's session
+
+
+# ---------- detection pool ----------
+def _pool_init(backend):
+    face_detector.get_detector(backend)   # load the model once per worker, not per task
+
+def _detect_batch(backend, frames):
+    detector = face_detector.get_detector(backend)
+    # cascades only need the gray image (that is what was sent); the DNN needs BGR
+    return [detector.detect(f, gray=f if f.ndim == 2 else None) for f in frames]
+
+
+class DetectionBatcher:
+    """
+    Face detector shared by all seat threads. detect(frame) blocks the
+    calling seat until its result is back; frames from different seats are
+    grouped into batches of up to BATCH_MAX and run on a process pool, with
+    several batches in flight at once. The backend is loaded here first, so
+    a missing model or OpenCV build fails with a RuntimeError instead of
+    breaking the pool under every seat.
+    """
+
+    def __init__(self, backend=None, workers=None):
+        self.backend = backend or face_detector.DEFAULT_BACKEND
+        self.workers = workers or os.cpu_count() or 1
+        self.send_gray = self.backend != "dnn"
+        try:
+            face_detector.get_detector(self.backend)
+        except Exception as e:
+            raise RuntimeError(f"face detector {self.backend!r} is not usable: {type(e).__name__}: {e}") from e
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"),
+                                        initializer=_pool_init, initargs=(self.backend,))
+        self.batches = 0
+        self.frames = 0
+        self._queue = queue.Queue()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="detect-batcher", daemon=True)
+        self._thread.start()
+
+    def detect(self, frame, gray=None):
+        if self.send_gray:
+            frame = gray if gray is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        result = Future()
+        self._queue.put((frame, result))
+        return result.result()
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            deadline = time.perf_counter() + BATCH_WAIT
+            while len(batch) < BATCH_MAX:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=left))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.frames += len(batch)
+            try:
+                task = self.pool.submit(_detect_batch, self.backend, [f for f, _ in batch])
+            except RuntimeError as e:   # pool shut down
+                for _, result in batch:
+                    result.set_exception(e)
+                continue
+            task.add_done_callback(lambda t, batch=batch: self._deliver(t, batch))
+
+    def _deliver(self, task, batch):
+        try:
+            faces = task.result()
+        except Exception as e:
+            for _, result in batch:
+                result.set_exception(e)
+            return
+        for (_, result), found in zip(batch, faces):
+            result.set_result(found)
+
+    def mean_batch(self):
+        return self.frames / self.batches if self.batches else 0.0
+
+    def close(self):
+        self._stopping = True
+        self._thread.join(2.0)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ---------- seats ----------
+class Seat:
+    """One monitored seat: a capture source, a session row and a PresenceMonitor thread."""
+
+    def __init__(self, seat_id, source, user_id=None, session_name="Lab session", minutes=SESSION_MINUTES):
+        self.seat_id = seat_id
+        self.spec = source
+        self.user_id = user_id
+        self.session_name = session_name
+        self.planned_sec = int(minutes * 60)
+        self.session_id = None
+        self.started = None
+        self.absences = 0
+        self.monitor = None
+        self.error = None
+        self._source = None
+        self._thread = None
+
+    def start(self, detector, stop_event):
+        source = capture.open_source(self.spec, capture.RealClock(stop_event))
+        if source is None or not source.isOpened():
+            self.error = f"could not open source {self.spec!r}"
+            print(f"Seat {self.seat_id}: {self.error}")
+            return False
+        if isinstance(source, capture.FrameSource):
+            read = frame_buffer.reader(source, frame_buffer.FrameRing())
+        else:
+            source = capture.StreamReader(source, self.seat_id)
+            read = source.read
+        self._source = source
+        self.started = time.time()
+        self.session_id = database.start_session(self.user_id, self.session_name, self.planned_sec,
+                                                 datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self.monitor = presence.PresenceMonitor(detector, capture.RealClock(stop_event))
+        self._thread = threading.Thread(target=self._run, args=(read, stop_event),
+                                        name=f"seat-{self.seat_id}", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, read, stop_event):
+        try:
+            self.monitor.run(read, on_absent=self._on_absent,
+                             should_stop=lambda: (stop_event.is_set() or self._source.finished
+                                                  or time.time() - self.started >= self.planned_sec))
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"Seat {self.seat_id} stopped:", self.error)
+
+    def _on_absent(self):
+        self.absences += 1
+        database.enqueue_distraction_event(self.session_id, "no_face", {"seat": self.seat_id})
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.join(5.0)
+        if self._source is not None:
+            self._source.release()
+        if self.session_id is not None:
+            elapsed = int(time.time() - self.started)
+            if not database.flush_writes():
+                database.update_session_distractions(self.session_id, self.absences)   # events were lost
+            database.finalize_session(self.session_id, elapsed, elapsed >= self.planned_sec and self.error is None,
+                                      datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    def stats(self):
+        return {"seat": self.seat_id, "session_id": self.session_id,
+                "frames": self.monitor.frames if self.monitor else 0,
+                "absences": self.absences, "error": self.error}
+
+
+class LabServer:
+    """Runs a list of Seats against one DetectionBatcher until stopped or all sessions end."""
+
+    def __init__(self, seats, backend=None, workers=None):
+        self.seats = list(seats)
+        self.backend = backend
+        self.workers = workers
+        self.batcher = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        database.init_db()
+        self.batcher = DetectionBatcher(self.backend, self.workers)
+        started = sum(seat.start(self.batcher, self.stop_event) for seat in self.seats)
+        print(f"Lab server: {started}/{len(self.seats)} seats running, "
+              f"{self.batcher.workers} detection workers ({self.batcher.backend}).")
+        return started
+
+    def wait(self, poll=1.0):
+        while not self.stop_event.is_set() and any(seat.running() for seat in self.seats):
+            self.stop_event.wait(poll)
+
+    def stop(self):
+        self.stop_event.set()
+        for seat in self.seats:
+            seat.stop()
+        if self.batcher is not None:
+            self.batcher.close()
+        database.flush_writes()
+
+    def stats(self):
+        return {"seats": [seat.stats() for seat in self.seats],
+                "batches": self.batcher.batches if self.batcher else 0,
+                "mean_batch": self.batcher.mean_batch() if self.batcher else 0.0}
+
+
+def read_seats(path, minutes=SESSION_MINUTES):
+    """Seats from a CSV with rows 'seat,source,user_id,session_name' (header optional)."""
+    seats = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0] == "seat" or row[0].startswith("#"):
+                continue
+            row += [""] * (4 - len(row))
+            seats.append(Seat(row[0], row[1].strip(), int(row[2]) if row[2].strip() else None,
+                              row[3].strip() or "Lab session", minutes))
+    return seats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-seat presence monitoring")
+    parser.add_argument("seats", help="CSV with rows seat,source,user_id,session_name")
+    parser.add_argument("--minutes", type=float, default=SESSION_MINUTES, help="session length per seat")
+    parser.add_argument("--workers", type=int, default=None, help="detection processes (default: CPU count)")
+    parser.add_argument("--backend", default=None, choices=sorted(face_detector.BACKENDS))
+    args = parser.parse_args(argv)
+    server = LabServer(read_seats(args.seats, args.minutes), args.backend, args.workers)
+    try:
+        started = server.start()
+    except RuntimeError as e:
+        print("Lab server:", e)
+        started = 0
+    if not started:
+        server.stop()
+        return
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        server.stop()
+        database.shutdown()
+    for seat in server.stats()["seats"]:
+        print(f"Seat {seat['seat']}: session {seat['session_id']}, {seat['frames']} frames, "
+              f"{seat['absences']} absences" + (f", error: {seat['error']}" if seat["error"] else ""))
+
+if __name__ == "__main__":
+    main()
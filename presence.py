@@ -0,0 +1,290 @@
+# presence.py
+# Per-frame presence pipeline used by the camera loop.
+# MotionGate: skip a frame entirely when a tiny downscaled view shows no change.
+# FaceTracker: run the full detector only every few frames (or when tracking is
+# lost) and follow the face in between with template matching in a small ROI.
+# PresencePipeline chains the two; PresenceMonitor is the camera loop itself
+# (initial window, absence threshold, cooldown) on any frame source and clock.
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except Exception:
+    CV2_AVAILABLE = False
+
+import capture
+
+REDETECT_EVERY = 10             # full detection at least every N frames (~3.5 s at 0.35 s/frame)
+ABSENT_REDETECT_EVERY = 3       # with no face found, detect on every Nth frame only (a return shows up <= 0.7 s late)
+TRACK_MIN_CONFIDENCE = 0.6      # normalized correlation below this -> re-detect
+TRACK_SEARCH_MARGIN = 0.5       # search ROI = face box grown by this fraction on each side
+TRACK_SCALE = 0.5               # template matching runs at this scale
+
+MOTION_SIZE = (80, 60)          # motion is measured on a frame this small
+MOTION_PIXEL_DELTA = 15         # gray-level difference that counts as a changed pixel
+MOTION_AREA_FRACTION = 0.02     # changed-pixel fraction that counts as motion
+MOTION_BACKGROUND_ALPHA = 0.1   # running-average background update weight
+MOTION_MAX_STALE = 6            # frames a result may be carried forward (~2 s at 0.35 s/frame)
+
+MIN_FACE_AREA = 0.01            # largest face must cover this fraction of the frame to count as present
+
+# Camera loop timing (gui.py passes its own config values)
+POLL_INTERVAL = 0.35            # secs between frames
+MISSING_THRESHOLD = 4           # secs of continuous absence before flagging
+INITIAL_TIMEOUT = 6             # secs to try to find a face at session start
+COOLDOWN = 6                    # secs to wait after flagging
+READ_RETRY = 0.2                # secs to wait after a failed read
+
+
+def face_present(faces, frame, min_area=MIN_FACE_AREA):
+    """The camera loop's presence rule: some face box covers at least `min_area` of the frame."""
+    h, w = frame.shape[:2]
+    return any(fw * fh >= min_area * w * h for (_, _, fw, fh) in faces)
+
+
+class FaceTracker:
+    """
+    Detect-then-track wrapper around a face_detector.FaceDetector.
+    update(frame) returns face boxes in the same (x, y, w, h) format as
+    detector.detect(), so callers keep their presence rules unchanged.
+    `mode` and `confidence` describe how the last result was produced.
+    While the last detection found nothing there is no face to track, so
+    full detection only runs every `absent_redetect_every` frames.
+    """
+
+    def __init__(self, detector, redetect_every=REDETECT_EVERY, absent_redetect_every=ABSENT_REDETECT_EVERY,
+                 min_confidence=TRACK_MIN_CONFIDENCE, margin=TRACK_SEARCH_MARGIN, scale=TRACK_SCALE):
+        self.detector = detector
+        self.redetect_every = redetect_every
+        self.absent_redetect_every = absent_redetect_every
+        self.min_confidence = min_confidence
+        self.margin = margin
+        self.scale = scale
+        self.mode = None            # "detect", "track" or "absent" (no face, detection skipped)
+        self.confidence = 0.0
+        self.detections = 0
+        self.frames = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the tracked face; the next update() runs full detection."""
+        self._box = None
+        self._template = None
+        self._since_detect = 0
+        self._absent = False        # the last detection found no face
+
+    def update(self, frame):
+        self.frames += 1
+        if self._template is not None and self._since_detect < self.redetect_every:
+            box = self._track(frame)
+            if box is not None:
+                self._since_detect += 1
+                self._box = box
+                self.mode = "track"
+                return [box]
+        elif self._absent and self._since_detect < self.absent_redetect_every - 1:
+            self._since_detect += 1
+            self.mode = "absent"
+            return []
+        return self._detect(frame)
+
+    def _detect(self, frame):
+        self.detections += 1
+        self.mode = "detect"
+        faces = self.detector.detect(frame)
+        self._since_detect = 0
+        self._absent = not faces
+        if not faces:
+            self._box = self._template = None
+            self.confidence = 0.0
+            return faces
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        self._box = (x, y, w, h)
+        self._template = self._small_gray(frame[y:y + h, x:x + w])
+        self.confidence = 1.0
+        return faces
+
+    def _small_gray(self, bgr):
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def _track(self, frame):
+        x, y, w, h = self._box
+        fh, fw = frame.shape[:2]
+        mx, my = int(w * self.margin), int(h * self.margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(fw, x + w + mx), min(fh, y + h + my)
+        roi = self._small_gray(frame[y0:y1, x0:x1])
+        th, tw = self._template.shape[:2]
+        if roi.shape[0] < th or roi.shape[1] < tw:
+            return None
+        scores = cv2.matchTemplate(roi, self._template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (bx, by) = cv2.minMaxLoc(scores)
+        self.confidence = float(best)
+        if best < self.min_confidence:
+            return None
+        return (x0 + int(bx / self.scale), y0 + int(by / self.scale), w, h)
+
+
+class MotionGate:
+    """
+    Cheap change detector on a downscaled, blurred gray frame compared with a
+    running-average background. should_process(frame) is False when nothing
+    moved and the previous result is younger than `max_stale` frames.
+    """
+
+    def __init__(self, size=MOTION_SIZE, pixel_delta=MOTION_PIXEL_DELTA,
+                 area_fraction=MOTION_AREA_FRACTION, alpha=MOTION_BACKGROUND_ALPHA,
+                 max_stale=MOTION_MAX_STALE):
+        self.size = size
+        self.pixel_delta = pixel_delta
+        self.area_fraction = area_fraction
+        self.alpha = alpha
+        self.max_stale = max_stale
+        self.motion = 0.0           # changed-pixel fraction of the last frame
+        self.skipped = 0
+        self.reset()
+
+    def reset(self):
+        self._background = None
+        self._stale = 0
+
+    def measure(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        small = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self._background is None:
+            self._background = small.astype("float32")
+            self.motion = 1.0
+            return self.motion
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self._background))
+        self.motion = cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1]) / diff.size
+        cv2.accumulateWeighted(small, self._background, self.alpha)
+        return self.motion
+
+    def should_process(self, frame):
+        moved = self.measure(frame) >= self.area_fraction
+        if moved or self._stale >= self.max_stale:
+            self._stale = 0
+            return True
+        self._stale += 1
+        self.skipped += 1
+        return False
+
+
+class PresencePipeline:
+    """
+    Motion gate + detect-then-track. process(frame) returns face boxes; when
+    the gate skips a frame it returns the previous result (`carried` is True).
+    """
+
+    def __init__(self, detector, motion_gate=True, tracking=True):
+        self.tracker = FaceTracker(detector) if tracking else None
+        self.detector = detector
+        self.gate = MotionGate() if motion_gate else None
+        self.faces = []
+        self.carried = False
+
+    def process(self, frame):
+        if self.gate is not None and not self.gate.should_process(frame):
+            self.carried = True
+            return self.faces
+        self.carried = False
+        self.faces = self.tracker.update(frame) if self.tracker else self.detector.detect(frame)
+        return self.faces
+
+    def fresh(self):
+        """True when the last result came from a detection or track of that frame, not a skip or carry."""
+        return not self.carried and (self.tracker is None or self.tracker.mode != "absent")
+
+    def confirm(self, frame):
+        """Full detection on `frame`, bypassing the gate and the absent backoff; tracking restarts from it."""
+        if self.tracker is not None:
+            self.tracker.reset()
+        self.carried = False
+        self.faces = self.tracker.update(frame) if self.tracker else self.detector.detect(frame)
+        return self.faces
+
+
+class PresenceMonitor:
+    """
+    The camera loop: look for a face during the initial window, then run
+    PresencePipeline on every frame; a present face calls on_face(), and
+    more than `missing_threshold` seconds without one calls on_absent() and
+    waits out `cooldown`. All time comes from `clock` (capture.RealClock or
+    capture.VirtualClock), so recorded and synthetic sources replay exactly
+    like the webcam. face_seen() restarts the absence clock (e.g. after the
+    user verified in the freeze popup). With a governor.PollingGovernor the
+    poll interval and cooldown come from it instead of the fixed values.
+    """
+
+    def __init__(self, detector, clock=None, poll_interval=POLL_INTERVAL, missing_threshold=MISSING_THRESHOLD,
+                 initial_timeout=INITIAL_TIMEOUT, cooldown=COOLDOWN, motion_gate=True, tracking=True,
+                 governor=None):
+        self.detector = detector
+        self.governor = governor
+        self.clock = clock or capture.RealClock()
+        self.poll_interval = poll_interval
+        self.missing_threshold = missing_threshold
+        self.initial_timeout = initial_timeout
+        self.cooldown = cooldown
+        self.pipeline = PresencePipeline(detector, motion_gate=motion_gate, tracking=tracking)
+        self.frames = 0
+        self.last_face_time = self.clock.now()
+
+    def face_seen(self):
+        self.last_face_time = self.clock.now()
+
+    def _poll_interval(self):
+        if self.governor is None:
+            return self.poll_interval
+        interval = self.governor.face_poll_interval()
+        if self.pipeline.gate is not None:
+            # keep the gate's staleness bound fixed in seconds, not frames
+            self.pipeline.gate.max_stale = max(1, int(MOTION_MAX_STALE * POLL_INTERVAL / interval))
+        return interval
+
+    def _cooldown(self):
+        return self.governor.cooldown() if self.governor else self.cooldown
+
+    def run(self, read, on_face=None, on_absent=None, should_stop=None):
+        """
+        `read()` returns the next frame or None; runs until should_stop() is true.
+        """
+        on_face = on_face or (lambda: None)
+        on_absent = on_absent or (lambda: None)
+        should_stop = should_stop or (lambda: False)
+        clock = self.clock
+        # initial face detection window
+        deadline = clock.now() + self.initial_timeout
+        while not should_stop() and clock.now() < deadline:
+            frame = read()
+            if frame is None:
+                clock.sleep(READ_RETRY); continue
+            self.frames += 1
+            if len(self.detector.detect(frame)) > 0:
+                self.face_seen(); on_face()
+                break
+            clock.sleep(self._poll_interval())
+        self.face_seen()
+        # continuous monitoring: skip static frames, track between periodic full detections
+        while not should_stop():
+            frame = read()
+            if frame is None:
+                clock.sleep(READ_RETRY); continue
+            self.frames += 1
+            present = face_present(self.pipeline.process(frame), frame)
+            if present:
+                self.face_seen(); on_face()
+            if self.governor:
+                self.governor.observe_face(present)
+            # absence check: never flag on a skipped or carried-forward result, the
+            # user may be back (e.g. during the cooldown after the last flag)
+            if (clock.now() - self.last_face_time > self.missing_threshold and not self.pipeline.fresh()
+                    and face_present(self.pipeline.confirm(frame), frame)):
+                self.face_seen(); on_face()
+            if clock.now() - self.last_face_time > self.missing_threshold:
+                on_absent()
+                if self.governor:
+                    self.governor.observe_freeze()
+                clock.sleep(self._cooldown())
+            clock.sleep(self._poll_interval())
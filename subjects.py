@@ -0,0 +1,7 @@
+# subjects.py
+# Session topic suggestions shared by the GUI and the synthetic data generator.
+# Kept free of imports so tools can use the list without loading Tk or numpy.
+
+SUBJECT_SUGGESTIONS = ["Mathematics","Physics","Chemistry","Data Structures","C Programming",
+                       "C++","Python","AI/ML","Web Development","Databases","Operating Systems",
+                       "Electronics","Robotics","Assignments","Revision","Reading","Practice Problems"]
@@ -0,0 +1,156 @@
+# synthetic_data.py
+# Fills a MindAnchor DB with realistic fake history for load testing:
+# many users, years of sessions, skewed topics, distraction events and AI logs.
+# Usage: python synthetic_data.py --sessions 1000000 [--users 500] [--years 2] [--db path]
+# Writes to synthetic.db unless --db names another file; point it at the app DB
+# only on purpose, the fake users and sessions can't be told apart afterwards.
+
+import os
+import math
+import random
+import argparse
+import datetime
+
+import database
+from subjects import SUBJECT_SUGGESTIONS
+
+BATCH_ROWS = 50_000
+DEFAULT_DB = "synthetic.db"     # scratch file, never the app DB by default
+
+COUNTRIES = (("India", 60), ("United States", 12), ("United Kingdom", 6), ("Canada", 5),
+             ("Australia", 4), ("Other", 13))
+GENDERS = (("Male", 45), ("Female", 45), ("Other", 3), ("Prefer not to say", 7))
+INTERESTS = ("Studying", "Programming", "AI/ML", "Music", "Sports", "Reading")
+PLANNED_MINUTES = ((15, 10), (20, 10), (25, 35), (30, 15), (45, 15), (50, 8), (60, 7))
+DISTRACTION_REASONS = (("no_face", 60), ("switched_app", 30), ("manual", 10))
+# Relative study activity per hour of day: quiet nights, afternoon/evening peaks
+HOUR_WEIGHTS = (1, 0.5, 0.3, 0.2, 0.2, 0.5, 2, 4, 6, 7, 7, 6, 5, 6, 7, 8, 8, 7, 8, 10, 10, 8, 5, 2)
+
+
+def default_topics():
+    # The GUI's suggestion list, so generated topics look like real input
+    return list(SUBJECT_SUGGESTIONS)
+
+def _weighted(pairs):
+    values, weights = zip(*pairs)
+    return list(values), list(weights)
+
+def _poisson(rng, lam):
+    # Knuth's method; lam stays small (a handful of distractions per session)
+    limit = math.exp(-lam); k = 0; p = rng.random()
+    while p > limit:
+        k += 1; p *= rng.random()
+    return k
+
+
+class _User:
+    def __init__(self, uid, rng, n_topics):
+        self.id = uid
+        # per-user favourite topics: a private ordering over a Zipf(1.1) curve
+        order = list(range(n_topics)); rng.shuffle(order)
+        self.topic_weights = [0.0] * n_topics
+        for rank, topic in enumerate(order):
+            self.topic_weights[topic] = 1.0 / (rank + 1) ** 1.1
+        self.distractibility = rng.lognormvariate(0, 0.6)   # distractions per 25 min, roughly
+        self.completion_bias = min(0.95, max(0.2, rng.gauss(0.7, 0.15)))
+
+
+def _insert_users(cur, rng, count):
+    countries, country_w = _weighted(COUNTRIES)
+    genders, gender_w = _weighted(GENDERS)
+    rows = []
+    for i in range(count):
+        age = int(min(60, max(13, rng.gauss(21, 4))))
+        rows.append((f"User {i + 1}", rng.choices(countries, country_w)[0], age,
+                     rng.choices(genders, gender_w)[0], rng.choice(INTERESTS)))
+    first = (cur.execute("SELECT IFNULL(MAX(id), 0) FROM users").fetchone()[0]) + 1
+    cur.executemany("INSERT INTO users (name, country, age, gender, interest) VALUES (?, ?, ?, ?, ?)", rows)
+    return list(range(first, first + count))
+
+
+def generate(sessions, users=500, years=2, topics=None, events=True, seed=0, path=None):
+    """
+    Append `sessions` synthetic sessions (chronological ids) for `users` new
+    users spread over the last `years` years. Returns row counts per table.
+    """
+    rng = random.Random(seed)
+    topics = topics or default_topics()
+    database.init_db(path)
+    counts = {"users": users, "sessions": 0, "ai_logs": 0, "distraction_events": 0}
+
+    with database.transaction(path) as cur:
+        user_ids = _insert_users(cur, rng, users)
+    people = [_User(uid, rng, len(topics)) for uid in user_ids]
+    # a few heavy users do most of the studying
+    activity = [1.0 / (i + 1) ** 0.8 for i in range(len(people))]
+    hours = list(range(24))
+    planned, planned_w = _weighted(PLANNED_MINUTES)
+    reasons, reason_w = _weighted(DISTRACTION_REASONS)
+
+    days = max(1, int(years * 365))
+    first_day = datetime.date.today() - datetime.timedelta(days=days - 1)
+    # spread the total across days with +-30% daily noise
+    day_weights = [rng.uniform(0.7, 1.3) for _ in range(days)]
+    total_weight = sum(day_weights)
+    per_day = [int(sessions * w / total_weight) for w in day_weights]
+    per_day[-1] += sessions - sum(per_day)
+
+    # ids are assigned here (not by AUTOINCREMENT) so events/logs can reference them
+    session_sql = ("INSERT INTO sessions (id, user_id, session_name, duration_sec, distractions, completed, "
+                   "start_time, end_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+    session_rows, event_rows, log_rows = [], [], []
+
+    def flush():
+        with database.transaction(path) as cur:
+            cur.executemany(session_sql, session_rows)
+            cur.executemany(database.INSERT_DISTRACTION_EVENT_SQL, event_rows)
+            cur.executemany("INSERT INTO ai_logs (user_id, session_id, focus_score, recommended_duration) VALUES (?, ?, ?, ?)", log_rows)
+        counts["sessions"] += len(session_rows); counts["distraction_events"] += len(event_rows); counts["ai_logs"] += len(log_rows)
+        session_rows.clear(); event_rows.clear(); log_rows.clear()
+
+    with database.connection(path) as conn:
+        next_id = conn.execute("""SELECT MAX(IFNULL((SELECT MAX(id) FROM sessions), 0),
+                                            IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'sessions'), 0))""").fetchone()[0] + 1
+    with database.rollup_suspended(path):
+        for d, todays in enumerate(per_day):
+            day = first_day + datetime.timedelta(days=d)
+            starts = sorted(datetime.datetime.combine(day, datetime.time(rng.choices(hours, HOUR_WEIGHTS)[0], rng.randrange(60), rng.randrange(60)))
+                            for _ in range(todays))
+            for who, start in zip(rng.choices(people, activity, k=todays), starts):
+                minutes = rng.choices(planned, planned_w)[0]
+                completed = rng.random() < who.completion_bias
+                elapsed = minutes * 60 if completed else int(minutes * 60 * rng.uniform(0.2, 0.95))
+                n_dis = _poisson(rng, who.distractibility * elapsed / 1500)
+                end = start + datetime.timedelta(seconds=elapsed)
+                topic = rng.choices(topics, who.topic_weights)[0]
+                session_rows.append((next_id, who.id, topic, elapsed, n_dis, int(completed),
+                                     start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")))
+                if events:
+                    for _ in range(n_dis):
+                        ts = start + datetime.timedelta(seconds=rng.uniform(0, max(1, elapsed)))
+                        event_rows.append((next_id, ts.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], rng.choices(reasons, reason_w)[0], None))
+                if rng.random() < 0.3:
+                    score = max(0.0, 1.0 - 0.15 * n_dis) * (1.0 if completed else 0.7)
+                    log_rows.append((who.id, next_id, round(score, 3), minutes))
+                next_id += 1
+            if len(session_rows) >= BATCH_ROWS:
+                flush()
+        flush()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic MindAnchor data")
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-events", action="store_true", help="skip distraction_events rows")
+    parser.add_argument("--db", default=DEFAULT_DB,
+                        help=f"target DB file (default: {DEFAULT_DB}, a scratch file; the app DB is {database.DB_PATH})")
+    args = parser.parse_args(argv)
+    counts = generate(args.sessions, args.users, args.years, events=not args.no_events, seed=args.seed, path=args.db)
+    print(f"✅ Generated into {os.path.abspath(args.db)}: " + ", ".join(f"{t}={n:,}" for t, n in counts.items()))
+
+if __name__ == "__main__":
+    main()
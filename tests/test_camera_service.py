@@ -0,0 +1,54 @@
+# CameraService: a late release() from an earlier session never idles the camera.
+
+import pytest
+
+import capture
+
+
+class _Camera:
+    def __init__(self):
+        self.released = False
+
+    def grab(self):
+        return True
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(capture, "CV2_AVAILABLE", True)
+    monkeypatch.setattr(capture, "open_camera", lambda index: _Camera())
+    svc = capture.CameraService(idle_timeout=60)
+    yield svc
+    svc.close()
+
+
+def test_stale_release_keeps_camera_in_use(service):
+    first, second = object(), object()
+    cap = service.acquire(first)
+    assert cap is not None
+    assert service.acquire(second) is cap
+    service.release(first)
+    assert service.in_use
+    assert service._idle_timer is None
+    service.release(first)          # released twice: ignored
+    assert service.in_use
+    service.release(second)
+    assert not service.in_use
+    assert service._idle_timer is not None
+    assert service.state == "ready" and not cap.released
+
+
+def test_release_after_close_is_ignored(service):
+    old, new = object(), object()
+    service.acquire(old)
+    service.close()
+    cap = service.acquire(new)
+    service.release(old)            # camera thread of the session before close()
+    assert service.in_use
+    assert service._idle_timer is None
+    service.release(new)
+    service._close_if_idle()
+    assert service.state == "closed" and cap.released
@@ -0,0 +1,72 @@
+# history(): full-history views over the hot DB and any number of archive months.
+
+import datetime
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def archived_db(tmp_path):
+    """
+    15 archived months (more than SQLite's default ATTACH limit of 10) plus
+    today's sessions: user 1 twice a month, user 2 once, each with an event.
+    """
+    path = str(tmp_path / "mindanchor.db")
+    database.init_db(path)
+    with database.transaction(path) as cur:
+        for month in range(15):
+            year, mon = 2023 + month // 12, month % 12 + 1
+            for user_id, day in ((1, 3), (2, 10), (1, 17)):
+                cur.execute(database.START_SESSION_SQL, (user_id, "Mathematics", 1500, f"{year}-{mon:02d}-{day:02d} 09:00:00"))
+                cur.execute(database.INSERT_DISTRACTION_EVENT_SQL,
+                            (cur.lastrowid, f"{year}-{mon:02d}-{day:02d} 09:10:00", "window", None))
+        today = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for _ in range(3):
+            cur.execute(database.START_SESSION_SQL, (1, "Physics", 1200, today))
+    moved = database.archive_old_sessions(path=path)
+    assert len(moved) == 15
+    yield path
+    database.close_all()
+
+
+@pytest.mark.parametrize("since, archived", [(None, 45), ("2024-01", 9)])
+def test_history_reads_every_month(archived_db, since, archived):
+    with database.history(archived_db, since=since) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM all_sessions").fetchone()[0] == 3 + archived
+        assert conn.execute("SELECT COUNT(*) FROM all_distraction_events").fetchone()[0] == archived
+        ids = [r[0] for r in conn.execute("SELECT id FROM all_sessions")]
+        assert len(ids) == len(set(ids))
+    with database.connection(archived_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 3
+
+
+def test_hour_stats_span_archives(archived_db):
+    with database.history(archived_db) as conn:
+        rollup = conn.execute("SELECT topic, hour, SUM(sessions), SUM(focus_sec) FROM all_hour_stats "
+                              "WHERE user_id = 1 GROUP BY topic, hour ORDER BY topic, hour").fetchall()
+        expected = conn.execute("SELECT session_name, CAST(substr(start_time, 12, 2) AS INTEGER), COUNT(*), "
+                                "SUM(duration_sec) FROM all_sessions WHERE user_id = 1 "
+                                "GROUP BY 1, 2 ORDER BY 1, 2").fetchall()
+    assert rollup == expected
+    assert database.check_hour_stats(archived_db) == []
+
+
+def test_export_with_archive(archived_db, tmp_path):
+    counts = database.export_data(str(tmp_path / "export"), "jsonl", include_archive=True, path=archived_db)
+    assert counts["sessions"] == 48
+    assert counts["distraction_events"] == 45
+
+
+def test_history_for_one_user_and_some_tables(archived_db):
+    with database.history(archived_db, tables=("sessions", "distraction_events"), user_id=2) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM all_sessions").fetchone()[0] == 15
+        assert conn.execute("SELECT COUNT(*) FROM all_sessions WHERE user_id != 2").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM all_distraction_events").fetchone()[0] == 15
+        views = {r[0] for r in conn.execute("SELECT name FROM sqlite_temp_master WHERE type = 'view'")}
+        copied = {r[0] for r in conn.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'")}
+    assert views == {"all_sessions", "all_distraction_events"}
+    assert copied == {"archived_sessions", "archived_distraction_events"}
+    with database.history(archived_db, since="2024-01", tables=("hour_stats",), user_id=1) as conn:
+        assert conn.execute("SELECT SUM(sessions) FROM all_hour_stats").fetchone()[0] == 6 + 3
@@ -0,0 +1,26 @@
+# lab_server: a detector that can't load fails fast, before any seat or pool starts.
+
+import pytest
+
+import face_detector
+import lab_server
+
+
+def test_unusable_detector_fails_before_the_pool(monkeypatch):
+    def broken(backend=None):
+        raise RuntimeError("DNN face model not found")
+    monkeypatch.setattr(face_detector, "get_detector", broken)
+    monkeypatch.setattr(lab_server, "ProcessPoolExecutor",
+                        lambda *a, **k: pytest.fail("pool created for an unusable detector"))
+    with pytest.raises(RuntimeError, match="'dnn' is not usable"):
+        lab_server.DetectionBatcher("dnn", workers=1)
+
+
+def test_main_reports_an_unusable_detector(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(face_detector, "get_detector", lambda backend=None: 1 / 0)
+    monkeypatch.setattr(lab_server.database, "DB_PATH", str(tmp_path / "lab.db"))
+    seats = tmp_path / "seats.csv"
+    seats.write_text("seat1,synthetic\n")
+    lab_server.main([str(seats), "--minutes", "0.01"])
+    assert "'haar' is not usable: ZeroDivisionError" in capsys.readouterr().out
+    lab_server.database.close_all()
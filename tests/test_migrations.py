@@ -0,0 +1,119 @@
+# Upgrades fixture databases from every past schema version to SCHEMA_VERSION.
+
+import sqlite3
+
+import pytest
+
+import database
+
+# The tables init_db() created before schema versioning (user_version 0)
+BASELINE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        country TEXT,
+        age INTEGER,
+        gender TEXT,
+        interest TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        session_name TEXT,
+        duration_sec INTEGER,
+        distractions INTEGER DEFAULT 0,
+        completed INTEGER DEFAULT 0,
+        start_time TEXT,
+        end_time TEXT,
+        ai_comment TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    );
+    CREATE TABLE IF NOT EXISTS ai_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        session_id INTEGER,
+        focus_score REAL,
+        recommended_duration INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        FOREIGN KEY(session_id) REFERENCES sessions(id)
+    );
+"""
+
+SESSIONS = [
+    (1, "Mathematics", 1500, 2, 1, "2024-03-01 09:00:00"),
+    (1, "Mathematics", 900, 0, 0, "2024-03-01 14:00:00"),
+    (1, "Physics", 1200, 3, 1, "2024-03-02 10:00:00"),
+    (2, "Reading", 600, 1, 1, "2024-03-02 11:00:00"),
+    (None, None, 300, 0, 0, "2024-03-03 08:00:00"),
+    (2, "Reading", 450, 0, 0, None),   # never started: not rolled up
+]
+
+
+def _fixture_db(path, version):
+    """A DB as a release at `version` left it: baseline tables (0) or MIGRATIONS[:version], with data."""
+    conn = sqlite3.connect(path)
+    cur = conn.cursor()
+    if version == 0:
+        cur.executescript(BASELINE_SCHEMA)
+    else:
+        for migration in database.MIGRATIONS[:version]:
+            migration(cur)
+    cur.executemany("INSERT INTO users (name) VALUES (?)", [("Ada",), ("Linus",)])
+    cur.executemany("INSERT INTO sessions (user_id, session_name, duration_sec, distractions, completed, start_time) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", SESSIONS)
+    cur.execute(f"PRAGMA user_version = {version}")
+    conn.commit()
+    conn.close()
+
+
+def _names(path, kind):
+    with database.connection(path) as conn:
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "mindanchor.db")
+    database.close_all()
+
+
+@pytest.mark.parametrize("version", range(database.SCHEMA_VERSION + 1))
+def test_upgrade_from_every_version(db_path, version):
+    _fixture_db(db_path, version)
+    database.init_db(db_path)
+
+    assert database.schema_version(db_path) == database.SCHEMA_VERSION
+    assert database.check_daily_stats(db_path) == []
+    assert database.check_hour_stats(db_path) == []
+    assert {"users", "sessions", "ai_logs", "daily_stats", "hour_stats",
+            "distraction_events"} <= _names(db_path, "table")
+    assert {"idx_sessions_user_start", "idx_sessions_user_id",
+            "idx_distraction_events_session"} <= _names(db_path, "index")
+    assert set(database.DAILY_STATS_TRIGGER_NAMES + database.HOUR_STATS_TRIGGER_NAMES) <= _names(db_path, "trigger")
+    with database.connection(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == len(SESSIONS)
+
+
+@pytest.mark.parametrize("version", range(database.SCHEMA_VERSION + 1))
+def test_second_init_is_one_pragma(db_path, version):
+    _fixture_db(db_path, version)
+    database.init_db(db_path)
+
+    statements = []
+    with database.connection(db_path) as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        database.init_db(db_path)   # single-threaded: borrows the same idle pooled connection
+    finally:
+        with database.connection(db_path) as conn:
+            conn.set_trace_callback(None)
+    assert statements == ["PRAGMA user_version"]
+
+
+def test_fresh_db(db_path):
+    database.init_db(db_path)
+    assert database.schema_version(db_path) == database.SCHEMA_VERSION
+    assert database.check_daily_stats(db_path) == []
@@ -0,0 +1,103 @@
+# FaceTracker: full detection is rationed while no face is found.
+# PresenceMonitor: that rationing never flags a user who is back.
+
+import pytest
+
+import capture
+import presence
+
+
+class _NoFaces:
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame, gray=None):
+        self.calls += 1
+        return []
+
+
+def test_absent_backoff_detects_every_nth_frame():
+    detector = _NoFaces()
+    tracker = presence.FaceTracker(detector, absent_redetect_every=3)
+    modes = []
+    for _ in range(9):
+        assert tracker.update(None) == []
+        modes.append(tracker.mode)
+    assert detector.calls == 3
+    assert modes == ["detect", "absent", "absent"] * 3
+
+
+def test_reset_detects_on_the_next_frame():
+    detector = _NoFaces()
+    tracker = presence.FaceTracker(detector, absent_redetect_every=3)
+    tracker.update(None)
+    tracker.reset()
+    tracker.update(None)
+    assert detector.calls == 2
+
+
+class _Frame:
+    shape = (480, 640, 3)
+
+    def __getitem__(self, index):
+        return self
+
+
+class _ScriptedDetector:
+    """A 200x200 face whenever the clock is outside the scripted absences."""
+
+    def __init__(self, clock, absences):
+        self.clock = clock
+        self.absences = absences
+
+    def detect(self, frame, gray=None):
+        t = self.clock.now()
+        return [] if any(s <= t < e for s, e in self.absences) else [(220, 140, 200, 200)]
+
+
+@pytest.fixture
+def no_cv2_tracking(monkeypatch):
+    # the template match needs cv2; a failed match sends every present frame to detection
+    monkeypatch.setattr(presence.FaceTracker, "_small_gray", lambda self, bgr: bgr)
+    monkeypatch.setattr(presence.FaceTracker, "_track", lambda self, frame: None)
+
+
+def test_no_flag_after_the_user_returns(no_cv2_tracking):
+    absences = [(10, 18), (28, 31), (41, 56)]
+    clock = capture.VirtualClock()
+    detector = _ScriptedDetector(clock, absences)
+    monitor = presence.PresenceMonitor(detector, clock, motion_gate=False, tracking=True)
+    flags = []
+    monitor.run(lambda: _Frame(), on_absent=lambda: flags.append(clock.now()),
+                should_stop=lambda: clock.now() >= 70)
+    assert flags
+    # every flag falls inside an absence, none after the user is back;
+    # 28-31 s is shorter than the missing threshold and never flags
+    assert all(any(s <= t <= e for s, e in absences) for t in flags)
+    assert not any(28 <= t <= 31 for t in flags)
+    assert len(flags) == 3
+
+
+@pytest.mark.parametrize("motion_gate,tracking", [(True, True), (False, True), (True, False), (False, False)])
+def test_synthetic_feed_flags_each_long_absence_once(motion_gate, tracking):
+    pytest.importorskip("cv2")
+    import frame_buffer
+    clock = capture.VirtualClock()
+    source = capture.SyntheticSource(clock=clock)
+    detector = _SourceDetector(source)
+    monitor = presence.PresenceMonitor(detector, clock, motion_gate=motion_gate, tracking=tracking)
+    flags = []
+    monitor.run(frame_buffer.reader(source, frame_buffer.FrameRing()),
+                on_absent=lambda: flags.append(source.elapsed()), should_stop=lambda: source.finished)
+    absences = source.absences()
+    assert flags and all(any(s <= t <= e for s, e in absences) for t in flags)
+
+
+class _SourceDetector:
+    """Reports SyntheticSource.face_box, like benchmark.py's scripted detector."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def detect(self, frame, gray=None):
+        return [self.source.face_box] if self.source.face_box else []
@@ -0,0 +1,114 @@
+# ResponseCache: LRU + TTL, keyed on the stats context, and only finished replies are stored.
+
+import threading
+import types
+
+import pytest
+
+import chatbot_manager
+from chatbot_manager import ChatbotManager, ResponseCache
+
+SCOPE = ("tinyllama", "context-hash")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(size=2)
+    cache.put("first", SCOPE, "one", 0.1)
+    cache.put("second", SCOPE, "two", 0.1)
+    assert cache.get("first", SCOPE) == "one"     # now most recently used
+    cache.put("third", SCOPE, "three", 0.1)
+    assert cache.get("second", SCOPE) is None
+    assert cache.get("first", SCOPE) == "one"
+    assert cache.get("third", SCOPE) == "three"
+    assert cache.stats()["evicted"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(chatbot_manager, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    cache = ResponseCache(ttl=60)
+    cache.put("Give me a focus tip", SCOPE, "Put the phone away.", 0.5)
+    now[0] += 59
+    assert cache.get("give me a focus tip!", SCOPE) == "Put the phone away."
+    now[0] += 2
+    assert cache.get("Give me a focus tip", SCOPE) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_size_zero_disables_the_cache():
+    cache = ResponseCache(size=0)
+    cache.put("Give me a focus tip", SCOPE, "Put the phone away.", 0.5)
+    assert cache.get("Give me a focus tip", SCOPE) is None
+    assert cache.stats()["entries"] == 0
+
+
+class _Client:
+    """ollama.Client stand-in: streams `reply` word by word, optionally failing after `fail_after` words."""
+
+    def __init__(self, reply="Stay with it, one block at a time.", fail_after=None):
+        self.words = reply.split(" ")
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def chat(self, model, messages, stream, keep_alive):
+        self.calls += 1
+        return self._stream()
+
+    def _stream(self):
+        for i, word in enumerate(self.words):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("server went away")
+            yield {"message": {"content": word + " "}, "done": False}
+        yield {"message": {"content": ""}, "done": True, "eval_count": len(self.words)}
+
+
+class _Chatterbot:
+    def get_response(self, prompt):
+        return "offline answer"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    m = ChatbotManager(main_db_path=str(tmp_path / "unused.db"), warm_up=False)
+    m.start = lambda: m                  # no engine loading: the test wires the client itself
+    m.ready.set_result(m)
+    m.ollama_available = True
+    m.chatterbot = _Chatterbot()
+    m._client = _Client()
+    m.context_text = "Today: 25 min focused."
+    m._get_user_stats_context = lambda: m.context_text
+    return m
+
+
+def test_reply_is_reused_until_the_stats_context_changes(manager):
+    first = manager.get_response("Give me a focus tip")
+    assert manager.get_response("give me a focus tip?") == first
+    assert manager._client.calls == 1
+    manager.context_text = "Today: 50 min focused."
+    manager.get_response("Give me a focus tip")
+    assert manager._client.calls == 2
+
+
+def test_cancelled_stream_is_not_cached(manager):
+    cancel = threading.Event()
+    for _text in manager.stream_response("Give me a focus tip", cancel=cancel):
+        cancel.set()
+    assert manager.cache.stats()["entries"] == 0
+    manager.get_response("Give me a focus tip")
+    assert manager._client.calls == 2
+
+
+def test_closed_stream_is_not_cached(manager):
+    stream = manager.stream_response("Give me a focus tip")
+    next(stream)
+    stream.close()
+    assert manager.cache.stats()["entries"] == 0
+
+
+def test_failed_stream_is_not_cached(manager):
+    manager._client = _Client(fail_after=2)
+    assert list(manager.stream_response("Give me a focus tip")) == ["Stay ", "with "]
+    assert manager.cache.stats()["entries"] == 0
+    manager._client = _Client(fail_after=0)
+    assert list(manager.stream_response("Give me a focus tip")) == ["offline answer"]
+    assert manager.cache.stats()["entries"] == 0
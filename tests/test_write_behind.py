@@ -0,0 +1,102 @@
+# WriteBehindQueue: no queued write is lost silently.
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # fail fast on a locked DB so the busy path is exercised in milliseconds
+    monkeypatch.setattr(database, "BUSY_TIMEOUT_MS", 50)
+    monkeypatch.setattr(database, "PRAGMAS", tuple(p for p in database.PRAGMAS if "busy_timeout" not in p)
+                        + ("PRAGMA busy_timeout = 50",))
+    monkeypatch.setattr(database, "WRITE_RETRY_INTERVAL", 0.05)
+    path = str(tmp_path / "mindanchor.db")
+    database.init_db(path)
+    with database.transaction(path) as cur:
+        cur.execute(database.START_SESSION_SQL, (1, "Mathematics", 1500, "2024-03-01 09:00:00"))
+    yield path
+    database.close_all()
+
+
+def _events(path):
+    with database.connection(path) as conn:
+        return [r[0] for r in conn.execute("SELECT reason FROM distraction_events ORDER BY id")]
+
+
+def _distractions(path):
+    with database.connection(path) as conn:
+        return conn.execute("SELECT distractions FROM sessions WHERE id = 1").fetchone()[0]
+
+
+def _enqueue_event(writer, reason):
+    writer.enqueue(database.INSERT_DISTRACTION_EVENT_SQL, (1, "2024-03-01 09:05:00", reason, None))
+    writer.enqueue(database.RECONCILE_DISTRACTIONS_SQL, (1, 1), key=("distractions", 1))
+
+
+def test_bad_write_does_not_roll_back_its_batch(db_path):
+    writer = database.WriteBehindQueue(db_path)
+    try:
+        _enqueue_event(writer, "window")
+        _enqueue_event(writer, None)          # NOT NULL violation
+        _enqueue_event(writer, "no_face")
+        assert writer.flush(5) is False       # a write it waited on was dropped
+        assert _events(db_path) == ["window", "no_face"]
+        assert _distractions(db_path) == 2
+        assert writer.dropped == 1
+        _enqueue_event(writer, "manual")
+        assert writer.flush(5) is True        # only reports drops since the last flush
+        assert _events(db_path) == ["window", "no_face", "manual"]
+    finally:
+        writer.stop(5)
+
+
+def test_busy_db_is_retried_not_dropped(db_path):
+    writer = database.WriteBehindQueue(db_path)
+    locker = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")         # hold the write lock well past the busy timeout
+    try:
+        _enqueue_event(writer, "window")
+        assert writer.flush(0.5) is False     # still pending: timed out, not "durable"
+        threading.Timer(0.3, locker.rollback).start()
+        assert writer.flush(20) is True
+        assert _events(db_path) == ["window"]
+        assert _distractions(db_path) == 1
+        assert writer.dropped == 0
+    finally:
+        writer.stop(5)
+        locker.close()
+
+
+def test_busy_retries_are_capped(db_path, monkeypatch):
+    monkeypatch.setattr(database, "WRITE_BUSY_ATTEMPTS", 3)
+    writer = database.WriteBehindQueue(db_path)
+    locker = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")         # never released while the writer retries
+    try:
+        _enqueue_event(writer, "window")
+        start = time.monotonic()
+        assert writer.flush(10) is False      # dropped and reported, not retried forever
+        assert time.monotonic() - start < 10
+        assert writer.dropped == 2            # the event and its reconcile
+        locker.rollback()
+        _enqueue_event(writer, "manual")
+        assert writer.flush(5) is True        # the writer keeps going once the DB frees up
+        assert _events(db_path) == ["manual"]
+    finally:
+        writer.stop(5)
+        locker.close()
+
+
+def test_stop_commits_pending_writes(db_path):
+    writer = database.WriteBehindQueue(db_path, interval=60)
+    _enqueue_event(writer, "window")
+    start = time.monotonic()
+    writer.stop(5)
+    assert time.monotonic() - start < 5
+    assert _events(db_path) == ["window"]
@@ -0,0 +1,217 @@
+# vision_worker.py
+# Optional vision process: owns cv2.VideoCapture, runs face presence detection
+# off the Tk process (no GIL contention with the UI), writes frames into a
+# shared-memory FrameRing and reports presence events over a pipe.
+#
+#   GUI process                              worker process
+#   VisionWorker.start()  --- spawn --->     _worker_main(): capture + PresenceMonitor
+#   worker.frames (FrameRing views)  <-shm-  frames written in place
+#   worker.events()                  <-pipe- ("frame", seq) / ("face",) / ("no_face",) / ("error", msg)
+#   worker.face_seen() / input_seen() / stop()  -pipe-> ("seen",) / ("input",) / ("stop",)
+
+import time
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False   # VisionWorker.start() fails and the GUI keeps the camera thread
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except Exception:
+    CV2_AVAILABLE = False
+
+import capture
+import frame_buffer
+
+FRAME_SHAPE = (480, 640, 3)     # frames are stored at the size the camera is asked for
+JOIN_TIMEOUT = 3.0              # secs to wait for a clean exit before terminating the worker
+INPUT_FORWARD_INTERVAL = 1.0    # keyboard/mouse activity is forwarded at most this often (secs)
+
+
+def frame_views(buf, shape=FRAME_SHAPE, slots=frame_buffer.FRAME_SLOTS):
+    """`slots` uint8 frames of `shape` laid out back to back in `buf`."""
+    size = int(np.prod(shape))
+    return [np.ndarray(shape, np.uint8, buffer=buf, offset=i * size) for i in range(slots)]
+
+
+# ---------- worker process side ----------
+class _Worker:
+    """Runs PresenceMonitor in the worker; doubles as its clock so sleeps keep serving the pipe."""
+
+    def __init__(self, conn, ring, config):
+        self.conn = conn
+        self.ring = ring
+        self.config = config
+        self.stopping = False
+        self.monitor = None
+        self.governor = None
+
+    def _handle(self, msg):
+        if msg[0] == "stop":
+            self.stopping = True
+        elif msg[0] == "seen" and self.monitor:   # the user verified in the GUI; restart the absence clock
+            self.monitor.face_seen()
+        elif msg[0] == "input" and self.governor:
+            self.governor.observe_input()
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        """Sleep, but keep answering GUI commands; returns early on stop."""
+        deadline = time.time() + seconds
+        while not self.stopping:
+            left = deadline - time.time()
+            if left <= 0 or not self.conn.poll(left):
+                return
+            self._handle(self.conn.recv())
+
+    def read(self, cap):
+        buf = self.ring.next_buffer()
+        ret, frame = cap.read(buf) if buf is not None else cap.read()
+        if not ret:
+            return None
+        if frame.shape != FRAME_SHAPE:
+            frame = cv2.resize(frame, (FRAME_SHAPE[1], FRAME_SHAPE[0]))
+        seq = self.ring.commit(frame)
+        self.conn.send(("frame", seq))
+        return self.ring.latest()[1]
+
+    def run(self, cap):
+        import face_detector, governor, presence
+        cfg = self.config
+        if cfg["adaptive"]:
+            self.governor = governor.PollingGovernor(cfg["missing_threshold"], cfg["cooldown"],
+                                                     cfg["absence_slo"], clock=self)
+        self.monitor = presence.PresenceMonitor(face_detector.get_detector(cfg["backend"]), self,
+                                                cfg["poll_interval"], cfg["missing_threshold"],
+                                                cfg["initial_timeout"], cfg["cooldown"], motion_gate=cfg["motion_gate"],
+                                                governor=self.governor)
+        self.monitor.run(lambda: self.read(cap),
+                         on_face=lambda: self.conn.send(("face",)),
+                         on_absent=lambda: self.conn.send(("no_face",)),
+                         should_stop=lambda: self.stopping)
+
+
+def _worker_main(conn, shm_name, slots, config):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = frame_buffer.FrameRing(slots, frame_views(shm.buf, FRAME_SHAPE, slots))
+    cap = None
+    try:
+        cap = capture.open_camera(config["camera_index"])
+        if cap is None:
+            conn.send(("error", "Camera not available or cannot be opened."))
+            return
+        _Worker(conn, ring, config).run(cap)
+    except (EOFError, BrokenPipeError):
+        pass   # GUI went away
+    except Exception as e:
+        try:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        except Exception:
+            pass
+    finally:
+        if cap is not None:
+            cap.release()
+        ring.release()
+        shm.close()
+        conn.close()
+
+
+# ---------- GUI process side ----------
+class VisionWorker:
+    """
+    Handle on the vision process. start() allocates the shared frame slots
+    and spawns the worker; `frames` is a FrameRing of read-only views over
+    them. events() blocks on the pipe and yields presence events (("face",),
+    ("no_face",), ("error", message)) until the worker exits; run it in a
+    thread. stop() is idempotent and frees the shared memory.
+    """
+
+    def __init__(self, backend=None, motion_gate=True, poll_interval=0.35, missing_threshold=4,
+                 initial_timeout=6, cooldown=6, camera_index=0, slots=frame_buffer.FRAME_SLOTS,
+                 adaptive=False, absence_slo=5):
+        self.config = {"backend": backend, "motion_gate": motion_gate, "poll_interval": poll_interval,
+                       "missing_threshold": missing_threshold, "initial_timeout": initial_timeout,
+                       "cooldown": cooldown, "camera_index": camera_index,
+                       "adaptive": adaptive, "absence_slo": absence_slo}
+        self.slots = slots
+        self.frames = None
+        self._shm = None
+        self._conn = None
+        self._process = None
+        self._send_lock = threading.Lock()   # Tk, pump and input-listener threads all send
+        self._last_input = 0.0
+
+    def start(self):
+        size = int(np.prod(FRAME_SHAPE)) * self.slots
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = frame_buffer.FrameRing(self.slots, frame_views(self._shm.buf, FRAME_SHAPE, self.slots))
+        self._conn, child = mp.Pipe()
+        # spawn, not fork: a forked copy of a Tk process is not safe
+        ctx = mp.get_context("spawn")
+        self._process = ctx.Process(target=_worker_main, name="mindanchor-vision", daemon=True,
+                                    args=(child, self._shm.name, self.slots, self.config))
+        try:
+            self._process.start()
+        except Exception:
+            self._process = None
+            self.stop()
+            raise
+        child.close()
+        return self
+
+    def events(self):
+        while True:
+            try:
+                msg = self._conn.recv()
+            except (EOFError, OSError, AttributeError, TypeError):
+                return   # worker exited or stop() closed the pipe
+            if msg[0] == "frame":
+                self.frames.publish(msg[1])
+            else:
+                yield msg
+
+    def face_seen(self):
+        self._send(("seen",))
+
+    def input_seen(self):
+        """Keyboard/mouse activity for the worker's polling governor (throttled)."""
+        now = time.time()
+        if now - self._last_input >= INPUT_FORWARD_INTERVAL:
+            self._last_input = now
+            self._send(("input",))
+
+    def _send(self, msg):
+        with self._send_lock:
+            try:
+                self._conn.send(msg)
+            except (OSError, AttributeError):
+                pass
+
+    def stop(self):
+        if self._process is not None:
+            self._send(("stop",))
+            self._process.join(JOIN_TIMEOUT)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(JOIN_TIMEOUT)
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self.frames is not None:
+            self.frames.release()
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                print("Vision worker: a frame view is still referenced; shared memory is freed when it is dropped.")
+            self._shm.unlink()
+            self._shm = None